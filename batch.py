@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Headless batch runner: send many prompts through ChatClient without the REPL.
+
+Prompts are read from stdin or a file, either as plain text (one prompt per
+line) or as JSONL records ({"id": ..., "prompt": ..., "model": ...}). Every
+prompt runs in its own independent conversation, several at a time, and one
+JSON result per prompt is written to the output as soon as it finishes.
+
+Usage:
+    python batch.py -i prompts.txt -o results.jsonl -c 8
+    cat prompts.jsonl | python batch.py --agent > results.jsonl
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import as_completed
+from rich.console import Console
+from config import Config
+from sessions import SessionManager
+import tools
+
+console = Console(stderr=True)
+
+
+def load_prompts(stream, input_format="auto"):
+    """
+    Parse prompts from a text stream.
+    Returns a list of job dicts with at least "id" and "prompt" keys.
+    """
+    lines = [line.rstrip("\r\n") for line in stream]
+    non_empty = [line for line in lines if line.strip()]
+
+    if input_format == "auto":
+        input_format = "jsonl" if non_empty and non_empty[0].lstrip().startswith("{") else "text"
+
+    jobs = []
+    for number, line in enumerate(non_empty, 1):
+        if input_format == "jsonl":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on prompt line {number}: {e}")
+            if not isinstance(record, dict) or not record.get("prompt"):
+                raise ValueError(f"Prompt line {number} has no 'prompt' field")
+            record.setdefault("id", str(number))
+            jobs.append(record)
+        else:
+            jobs.append({"id": str(number), "prompt": line})
+    return jobs
+
+
+def run_prompt(job, manager, verbose=False):
+    """Run a single prompt in a fresh session and return its result record."""
+    result = {
+        "id": job["id"],
+        "model": job.get("model") or manager.config.get_model(),
+        "prompt": job["prompt"],
+        "response": None,
+        "error": None,
+    }
+    started_at = time.time()
+    start = time.perf_counter()
+    session = None
+    try:
+        session = manager.create(
+            model=job.get("model"),
+            agent_mode=bool(job["agent"]) if "agent" in job else None,
+            console=Console(stderr=True, quiet=not verbose),
+        )
+        result["response"] = manager.send(session.id, job["prompt"])
+        if result["response"] is None:
+            result["error"] = session.client.last_error or "Request failed"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if session:
+            manager.close(session.id)
+
+    client = session.client if session else None
+    result["answered_by"] = client.last_model if client else None  # Differs from "model" when a fallback won
+    result["usage"] = {
+        "prompt_tokens": client.prompt_tokens if client else 0,
+        "completion_tokens": client.completion_tokens if client else 0,
+        "total_tokens": client.total_tokens if client else 0,
+        "cost": round(client.total_cost, 8) if client else 0.0,
+        "cached_responses": client.cache_hits if client else 0,
+    }
+    result["timings"] = {
+        "started_at": started_at,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+    return result
+
+
+def run_batch(jobs, base_config, output, concurrency=4, verbose=False):
+    """
+    Run all jobs with at most `concurrency` conversations in flight, sharing
+    one connection pool and model registry. Results are written to `output`
+    as JSONL in completion order. Returns a summary dict.
+    """
+    write_lock = threading.Lock()
+    summary = {"total": len(jobs), "succeeded": 0, "failed": 0, "total_tokens": 0}
+    start = time.perf_counter()
+    concurrency = max(1, concurrency)
+    manager = SessionManager(base_config, max_workers=concurrency)
+
+    try:
+        futures = [manager.executor.submit(run_prompt, job, manager, verbose) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            with write_lock:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+            summary["failed" if result["error"] else "succeeded"] += 1
+            summary["total_tokens"] += result["usage"]["total_tokens"]
+            if not verbose:
+                status = "[red]✗[/red]" if result["error"] else "[green]✓[/green]"
+                console.print(f"{status} {result['id']} ({result['timings']['elapsed_s']:.2f}s)")
+    finally:
+        manager.shutdown()
+    summary["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def main(argv=None):
+    """Command-line entry point for batch mode."""
+    parser = argparse.ArgumentParser(description="Run prompts through the AI Chat CLI without the interactive REPL.")
+    parser.add_argument("-i", "--input", default="-", help="Prompt file (text or JSONL). Defaults to stdin.")
+    parser.add_argument("-o", "--output", default="-", help="Results file (JSONL). Defaults to stdout.")
+    parser.add_argument("-f", "--format", choices=["auto", "text", "jsonl"], default="auto", help="Input format.")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Conversations to run at once (default: 4).")
+    parser.add_argument("-m", "--model", help="Default model for prompts that don't set one.")
+    parser.add_argument("--agent", action="store_true", help="Enable coding agent mode (file system tools).")
+    parser.add_argument("--approve-tools", action="store_true",
+                        help="Auto-approve tools that normally ask for confirmation (script execution, deletion).")
+    parser.add_argument("--follow-through", choices=["auto", "off"], default="auto",
+                        help="When the AI promises a tool call but doesn't make it, ask it to follow through (auto) or not (off).")
+    parser.add_argument("--cache", action="store_true",
+                        help="Answer repeated identical requests from the local response cache.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show full conversation output on stderr.")
+    args = parser.parse_args(argv)
+
+    cfg = Config()
+    if not cfg.api_key:
+        console.print("[bold red]Error: OPENROUTER_API_KEY environment variable not set.[/bold red]")
+        return 1
+    if args.model:
+        cfg.set_model(args.model)
+    cfg.agent_mode = args.agent
+    if args.cache:
+        cfg.response_cache = True
+    cfg.interactive = False
+    cfg.promise_policy = args.follow_through
+    tools.set_confirmation_mode("approve" if args.approve_tools else "deny")
+
+    try:
+        if args.input == "-":
+            jobs = load_prompts(sys.stdin, args.format)
+        else:
+            with open(args.input, "r", encoding="utf-8") as f:
+                jobs = load_prompts(f, args.format)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Error reading prompts: {e}[/bold red]")
+        return 1
+
+    if not jobs:
+        console.print("[yellow]No prompts to run.[/yellow]")
+        return 0
+
+    console.print(f"[cyan]Running {len(jobs)} prompt(s) with concurrency {args.concurrency}...[/cyan]")
+    if args.output == "-":
+        summary = run_batch(jobs, cfg, sys.stdout, args.concurrency, args.verbose)
+    else:
+        with open(args.output, "a", encoding="utf-8") as out:
+            summary = run_batch(jobs, cfg, out, args.concurrency, args.verbose)
+
+    console.print(f"[bold]Done:[/bold] {summary['succeeded']} succeeded, {summary['failed']} failed, "
+                  f"{summary['total_tokens']} tokens in {summary['elapsed_s']:.2f}s")
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+import tools
+
+MAX_CONCURRENT_BRANCHES = 8
+
+
+class Branch:
+    """One named line of the conversation, with its own ChatClient."""
+
+    def __init__(self, name, client, parent=None):
+        self.name = name
+        self.client = client
+        self.parent = parent
+        self.forked_at = len(client.conversation_history)  # Messages inherited from the parent
+        self.created_at = time.time()
+        self.lock = threading.Lock()  # One turn at a time per branch
+
+
+class BranchManager:
+    """
+    Named conversation branches for trying alternatives side by side. A fork
+    shares the history of the branch it came from (see
+    ConversationHistory.fork), so forking a long session is instant and
+    costs no extra memory until the branches diverge. Branches share the
+    connection pool, caches and latency stats, and can run turns concurrently.
+    """
+
+    def __init__(self, client, name="main"):
+        self._branches = {name: Branch(name, client)}
+        self.current = name
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The ChatClient of the current branch."""
+        return self.get(self.current).client
+
+    def get(self, name):
+        """Return a branch by name. Raises KeyError if it doesn't exist."""
+        with self._lock:
+            return self._branches[name]
+
+    def list(self):
+        """Return every branch, oldest first."""
+        with self._lock:
+            return sorted(self._branches.values(), key=lambda b: b.created_at)
+
+    def fork(self, name=None):
+        """Fork the current branch under a new name, switch to it and return it. Raises ValueError if the name is taken."""
+        parent = self.get(self.current)
+        with self._lock:
+            if name is None:
+                number = len(self._branches)
+                while f"branch-{number}" in self._branches:
+                    number += 1
+                name = f"branch-{number}"
+            if name in self._branches:
+                raise ValueError(f"Branch '{name}' already exists")
+            branch = Branch(name, parent.client.fork(), parent=parent.name)
+            self._branches[name] = branch
+            self.current = name
+        return branch
+
+    def switch(self, name):
+        """Make another branch current and return it. Raises KeyError if it doesn't exist."""
+        branch = self.get(name)
+        self.current = name
+        return branch
+
+    def shared_messages(self, name, other=None):
+        """How many leading messages a branch shares with another one (the current branch by default)."""
+        return self.get(name).client.conversation_history.common_prefix(
+            self.get(other or self.current).client.conversation_history)
+
+    def run(self, names, message):
+        """
+        Send the same message on several branches concurrently. Branch output
+        is silenced and prompts are answered automatically while they run
+        (tools that need confirmation are denied). Returns one dict per branch
+        with name, reply, error, latency, tokens and cost for that turn.
+        """
+        branches = [self.get(name) for name in names]
+        quiet = Console(quiet=True)
+
+        def run_one(branch):
+            client = branch.client
+            result = {"branch": branch.name, "reply": None, "error": None}
+            with branch.lock:
+                tokens, cost = client.total_tokens, client.total_cost
+                console, interactive = client.console, client.config.interactive
+                client.set_console(quiet)
+                client.config.interactive = False
+                started = time.monotonic()
+                try:
+                    result["reply"] = client.send_chat_request(message)
+                    if result["reply"] is None:
+                        result["error"] = client.last_error or "request failed"
+                except Exception as e:
+                    result["error"] = str(e)
+                finally:
+                    result["latency"] = time.monotonic() - started
+                    client.set_console(console)
+                    client.config.interactive = interactive
+                result["tokens"] = client.total_tokens - tokens
+                result["cost"] = client.total_cost - cost
+                result["messages"] = len(client.conversation_history)
+            return result
+
+        confirmation_mode = tools.CONFIRMATION_MODE
+        if confirmation_mode == "ask":
+            tools.set_confirmation_mode("deny")  # Several branches can't share one prompt
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(branches), MAX_CONCURRENT_BRANCHES)) as executor:
+                return list(executor.map(run_one, branches))
+        finally:
+            tools.set_confirmation_mode(confirmation_mode)
+
+    def close(self):
+        """Close every branch's client."""
+        for branch in self.list():
+            branch.client.close()
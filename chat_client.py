@@ -1,27 +1,60 @@
 import requests
+import copy
+import hashlib
 import json
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.console import Console
-from rich.markdown import Markdown
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from tools import TOOLS_DEFINITIONS, AVAILABLE_TOOLS
-import re
+from tools import TOOLS_DEFINITIONS, AVAILABLE_TOOLS, may_prompt
+from transport import SharedResources
+from conversation import ConversationHistory, Message, encode_payload
+from renderer import IncrementalMarkdownRenderer
+from promise_detector import PromiseDetector
+from hedging import Attempt, RequestCancelled
+from router import ModelRouter
+from tool_output import ToolOutputWriter
 
-console = Console()
+# Tool definitions never change at runtime, so their JSON is encoded once
+TOOLS_JSON = json.dumps(TOOLS_DEFINITIONS, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+# System message added to the conversation in agent mode
+AGENT_SYSTEM_PROMPT = "You are a helpful coding assistant with access to file system tools. You can list files, read files, write files, execute Python scripts, create directories, and delete files. Use these tools when the user asks you to work with files or code. Always explain what you're doing before using tools. IMPORTANT: When you promise to use a tool (like 'let me check the files' or 'I'll read that file'), you MUST actually call the appropriate tool function. Don't just say you will do something - actually do it by calling the function."
+
+# Model id fragments of models known to support function calling
+FUNCTION_CALLING_MODELS = [
+    'gpt-4', 'gpt-3.5-turbo', 'gpt-4-turbo', 'gpt-4o',
+    'claude-3', 'claude-3.5', 'claude-2',
+    'gemini-pro', 'gemini-1.5', 'gemini-flash',
+    'mistral-large', 'mistral-medium', 'mixtral',
+    'llama-3', 'llama-3.1', 'llama-3.2'
+]
+
+def supports_function_calling(model):
+    """True if the model is known to support function calling."""
+    model_id = model.lower()
+    return any(name in model_id for name in FUNCTION_CALLING_MODELS)
+
+# How many recent messages the prefetcher scans for file paths
+PREFETCH_WINDOW = 8
+
+# Tool results shorter than this are stored as-is even when repeated; a back-reference would save little
+DEDUPE_MIN_CHARS = 256
 
 class ChatClient:
     """Handles OpenRouter API communication and conversation management."""
     
-    def __init__(self, config):
+    def __init__(self, config, console=None, shared=None):
         self.config = config
-        self.api_base = "https://openrouter.ai/api/v1"
+        self.api_base = self.config.api_base
+        self.console = console if console is not None else Console()
         
         # Validate API key
         if not self.config.api_key:
             raise ValueError("OPENROUTER_API_KEY environment variable not set")
         if not self.config.api_key.startswith('sk-'):
-            console.print(f"[yellow]⚠️  Warning: API key doesn't look like a typical OpenRouter key (should start with 'sk-')[/yellow]")
+            self.console.print(f"[yellow]⚠️  Warning: API key doesn't look like a typical OpenRouter key (should start with 'sk-')[/yellow]")
         
         self.headers = {
             "Authorization": f"Bearer {self.config.api_key}",
@@ -29,167 +62,442 @@ class ChatClient:
             "HTTP-Referer": self.config.app_url,
             "X-Title": self.config.app_name,
         }
-        self.conversation_history = []
+        # Connection pool, model registry and file cache; shared when managed by a SessionManager
+        self.shared = shared if shared is not None else SharedResources(self.config)
+        self.http = self.shared.http
+        self.conversation_history = ConversationHistory()
+        self.tool_output = ToolOutputWriter(self.console)  # Prints tool results off the agent loop
+        self.router = ModelRouter(self.shared.latency, self.shared.models.get_pricing,
+                                  self.config.fast_models, self.config.routing)
+        self.store = None  # ConversationStore when persistence is enabled
+        self.session_log = None
         self.total_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
         self.total_cost = 0.0
+        self.cache_hits = 0
+        self.hedged_requests = 0
+        self.deduplicated_results = 0
+        self.deduplicated_chars = 0
+        self._tool_results = {}  # SHA-256 of a tool output -> the first history message carrying it
+        self.last_model = None  # Model that answered the last request (a fallback if hedging won)
+        self.last_error = None
 
     def test_api_connection(self):
         """Test if the API key and connection work."""
-        response = None
         try:
-            response = requests.get(f"{self.api_base}/models", headers=self.headers)
-            response.raise_for_status()
+            self.shared.models.refresh()
             return True
         except requests.exceptions.HTTPError as e:
-            if response and response.status_code == 401:
-                console.print("[bold red]❌ Authentication failed. Please check your OPENROUTER_API_KEY.[/bold red]")
-            elif response and response.status_code == 403:
-                console.print("[bold red]❌ Access forbidden. Your API key may not have the required permissions.[/bold red]")
-            elif response:
-                console.print(f"[bold red]❌ API test failed with HTTP {response.status_code}: {e}[/bold red]")
+            response = e.response
+            if response is not None and response.status_code == 401:
+                self.console.print("[bold red]❌ Authentication failed. Please check your OPENROUTER_API_KEY.[/bold red]")
+            elif response is not None and response.status_code == 403:
+                self.console.print("[bold red]❌ Access forbidden. Your API key may not have the required permissions.[/bold red]")
+            elif response is not None:
+                self.console.print(f"[bold red]❌ API test failed with HTTP {response.status_code}: {e}[/bold red]")
             else:
-                console.print(f"[bold red]❌ HTTP Error: {e}[/bold red]")
+                self.console.print(f"[bold red]❌ HTTP Error: {e}[/bold red]")
             return False
         except requests.exceptions.RequestException as e:
-            console.print(f"[bold red]❌ Connection test failed: {e}[/bold red]")
+            self.console.print(f"[bold red]❌ Connection test failed: {e}[/bold red]")
             return False
 
     def get_available_models(self):
         """Fetch available models from OpenRouter API."""
         try:
-            response = requests.get(f"{self.api_base}/models", headers=self.headers)
-            response.raise_for_status()
-            models_data = response.json().get("data", [])
-            return sorted(models_data, key=lambda x: x.get('id'))
+            return self.shared.models.get_models()
         except requests.exceptions.RequestException as e:
-            console.print(f"[bold red]Error fetching models: {e}[/bold red]")
+            self.console.print(f"[bold red]Error fetching models: {e}[/bold red]")
             return None
 
-    def _detect_promised_but_uncalled_tools(self, ai_message_content):
+    def _prefetch(self):
+        """Warm the file cache with paths from recent messages while the model is working."""
+        if self.config.agent_mode and self.shared.prefetcher:
+            self.shared.prefetcher.prefetch(self.conversation_history[-PREFETCH_WINDOW:])
+
+    def _follow_through_policy(self):
+        """Return how to handle promised but uncalled tools: "ask", "auto" or "off"."""
+        policy = self.config.promise_policy
+        if policy == "ask" and not self.config.interactive:
+            return "off"  # Nobody is there to answer the prompt
+        return policy
+
+    def _record_usage(self, data, model_id=None):
+        """Accumulate token usage and estimated cost from an API response."""
+        usage = data.get("usage")
+        if not usage:
+            return
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        self.total_tokens += usage.get('total_tokens', 0)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        model_id = model_id or self.last_model or self.config.get_model()
+        cost = self._estimate_cost(usage, model_id)
+        self.total_cost += cost
+        self.router.record_cost(model_id, cost)
+
+    def _estimate_cost(self, usage, model_id):
+        """USD cost of a response's usage: as reported by the API, else from the model's pricing."""
+        if "cost" in usage:
+            return float(usage["cost"])
+        prompt_price, completion_price = self.shared.models.get_pricing(model_id)
+        return usage.get('prompt_tokens', 0) * prompt_price + usage.get('completion_tokens', 0) * completion_price
+
+    def _check_budget(self):
+        """Return an error message if this conversation has exhausted its budget, else None."""
+        if self.config.token_budget is not None and self.total_tokens >= self.config.token_budget:
+            return f"Token budget exhausted ({self.total_tokens}/{self.config.token_budget} tokens)"
+        if self.config.cost_budget is not None and self.total_cost >= self.config.cost_budget:
+            return f"Cost budget exhausted (${self.total_cost:.4f}/${self.config.cost_budget:.4f})"
+        return None
+
+    def _read_stream(self, response, on_delta, on_first=None):
         """
-        Detect when AI promises to use tools but doesn't actually call them.
-        Returns a list of tools that were promised but not called.
+        Consume a server-sent events response, passing content deltas to
+        on_delta, and return it assembled into the non-streaming response shape.
+        on_first is called when the first event arrives.
         """
-        if not ai_message_content:
-            return []
-        
-        # Common patterns where AI promises to use tools
-        promise_patterns = [
-            r"let me (?:check|list|read|write|create|delete|execute|run)\s+(?:the\s+)?(.+)",
-            r"I(?:'ll|'m going to|will) (?:check|list|read|write|create|delete|execute|run)\s+(?:the\s+)?(.+)",
-            r"(?:checking|listing|reading|writing|creating|deleting|executing|running)\s+(?:the\s+)?(.+)",
-            r"I(?:'ll|will) (?:now\s+)?(?:proceed to\s+)?(?:check|list|read|write|create|delete|execute|run)",
-        ]
-        
-        promised_actions = []
-        content_lower = ai_message_content.lower()
-        
-        for pattern in promise_patterns:
-            matches = re.findall(pattern, content_lower, re.IGNORECASE)
-            promised_actions.extend(matches)
-        
-        # Look for specific tool-related keywords
-        tool_keywords = [
-            "file list", "directory", "check the file", "read the file", 
-            "write to", "create file", "delete file", "list files"
-        ]
-        
-        found_promises = []
-        for keyword in tool_keywords:
-            if keyword in content_lower:
-                found_promises.append(keyword)
-        
-        return found_promises
+        content_parts = []
+        tool_calls = {}
+        data = {}
+        for raw_line in response.iter_lines():
+            if not raw_line or raw_line.startswith(b":"):
+                continue  # Keep-alive comments
+            if not raw_line.startswith(b"data:"):
+                continue
+            if on_first:
+                on_first()
+                on_first = None
+            chunk_text = raw_line[5:].strip()
+            if chunk_text == b"[DONE]":
+                break
+            chunk = json.loads(chunk_text)
+            if "error" in chunk:
+                raise requests.exceptions.RequestException(
+                    f"Stream error: {chunk['error'].get('message', chunk['error'])}")
+            if chunk.get("usage"):
+                data["usage"] = chunk["usage"]
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta", {})
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+                    on_delta(delta["content"])
+                for tool_delta in delta.get("tool_calls") or []:
+                    call = tool_calls.setdefault(tool_delta.get("index", 0), {
+                        "id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                    if tool_delta.get("id"):
+                        call["id"] = tool_delta["id"]
+                    function = tool_delta.get("function") or {}
+                    call["function"]["name"] += function.get("name") or ""
+                    call["function"]["arguments"] += function.get("arguments") or ""
+
+        message = {"role": "assistant", "content": "".join(content_parts)}
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+        data["choices"] = [{"message": message}]
+        return data
+
+    def _post_chat(self, payload, on_delta=None):
+        """
+        POST a chat completion through the shared rate limiter, which retries
+        429/5xx responses with backoff. Byte-identical payloads are answered
+        from the response cache when it is enabled. When on_delta is given and
+        streaming is enabled, content is passed to it as it arrives.
+        Returns the response JSON; raises requests.exceptions.HTTPError for any
+        other error status.
+        """
+        raw_fields = {"tools": TOOLS_JSON} if payload.get("tools") is TOOLS_DEFINITIONS else None
+        body = encode_payload(payload, raw_fields)
+
+        cache = self.shared.response_cache
+        cache_key = None
+        if cache:
+            cache_key = cache.fingerprint(body)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                if self.config.debug:
+                    self.console.print(f"[dim]Debug: Response cache hit ({cache_key[:12]})[/dim]")
+                cached.pop("usage", None)  # Served locally: no tokens spent
+                self.last_model = payload["model"]
+                if on_delta:
+                    on_delta(cached['choices'][0]['message'].get('content') or "")
+                return cached
+
+        streaming = bool(on_delta) and self.config.stream
+        model = payload["model"]
+        fallbacks = [m for m in self.config.fallback_models if m != model]
+        if fallbacks:
+            model, data = self._post_hedged(payload, raw_fields, [model] + fallbacks, streaming, on_delta)
+        else:
+            attempt = Attempt(model)
+
+            def on_first():
+                self.shared.latency.record(model, time.monotonic() - attempt.started)
+
+            data = self._post_once(attempt, self._stream_body(body, streaming), streaming, on_delta, on_first)
+        self.last_model = model
+        # A fallback's answer is not what the cache key asked for, so only cache the requested model
+        if cache_key and model == payload["model"] and data.get("choices"):
+            cache.put(cache_key, data)
+        return data
+
+    @staticmethod
+    def _stream_body(body, streaming):
+        """Append the transport-only "stream" field to an encoded request body."""
+        return body[:-1] + (b',"stream":true}' if streaming else b',"stream":false}')
+
+    def _post_once(self, attempt, body, streaming, on_delta, on_first):
+        """
+        Send one chat completion request for attempt.model and read the reply.
+        on_first is called when the first byte of the reply arrives (before any
+        delta is passed on) and may raise RequestCancelled to abandon it.
+        """
+        def on_retry(retry, delay, status_code):
+            if not attempt.cancelled:
+                self.console.print(f"[dim]⏳ HTTP {status_code} from {attempt.model}, retry {retry} in {delay:.1f}s...[/dim]")
+
+        response, release = self.shared.rate_limiter.post(
+            self.http,
+            f"{self.api_base}/chat/completions",
+            attempt.model,
+            on_retry=on_retry,
+            headers=self.headers,
+            data=body,
+            stream=streaming,
+            timeout=(self.config.connect_timeout, self.config.request_timeout),
+        )
+        attempt.response = response
+        try:
+            with response:
+                if attempt.cancelled:
+                    raise RequestCancelled()
+                if response.status_code >= 400:
+                    response.content  # Read the provider's error message before the stream is closed
+                response.raise_for_status()
+                if streaming:
+                    return self._read_stream(response, on_delta, on_first)
+                on_first()
+                data = response.json()
+        finally:
+            release()
+        if on_delta:
+            on_delta(data['choices'][0]['message'].get('content') or "")
+        return data
+
+    def _post_hedged(self, payload, raw_fields, models, streaming, on_delta):
+        """
+        Race the request across `models`. The first model is asked first; if no
+        byte of its reply has arrived within the hedge delay (a percentile of
+        its measured time to first byte), or it fails, the next model is asked
+        as well. The first reply to start wins, the others are cancelled.
+        Returns (model, response JSON); raises the first model's error if all fail.
+        """
+        latency = self.shared.latency
+        cond = threading.Condition()
+        attempts = []
+        winner = []
+
+        def claim(attempt):
+            with cond:
+                if attempt.cancelled or winner:
+                    raise RequestCancelled()
+                attempt.ttfb = time.monotonic() - attempt.started
+                winner.append(attempt)
+                cond.notify_all()
+            latency.record(attempt.model, attempt.ttfb)
+            if attempt.model != models[0]:
+                self.console.print(f"[dim]Answered by fallback model {attempt.model}[/dim]")
+
+        def run(attempt):
+            try:
+                body = self._stream_body(encode_payload(dict(payload, model=attempt.model), raw_fields), streaming)
+                attempt.result = self._post_once(attempt, body, streaming, on_delta, lambda: claim(attempt))
+            except Exception as e:
+                attempt.error = e
+            finally:
+                with cond:
+                    attempt.done.set()
+                    cond.notify_all()
+
+        def start(model):
+            attempt = Attempt(model)
+            attempts.append(attempt)
+            threading.Thread(target=run, args=(attempt,), daemon=True, name=f"hedge-{model}").start()
+
+        try:
+            with cond:
+                start(models[0])
+                while not winner:
+                    waiting = [a for a in attempts if not a.done.is_set()]
+                    if len(attempts) == len(models):
+                        if not waiting:
+                            break  # Every model failed
+                        cond.wait()
+                        continue
+                    last = attempts[-1]
+                    delay = latency.hedge_delay(last.model, self.config.hedge_percentile, self.config.hedge_delay)
+                    remaining = last.started + delay - time.monotonic()
+                    if not last.done.is_set() and remaining > 0:
+                        cond.wait(remaining)
+                        continue
+                    reason = f"failed ({last.error})" if last.done.is_set() else f"no response after {delay:.1f}s"
+                    self.console.print(f"[dim]⏱️  {last.model}: {reason}, also trying {models[len(attempts)]}...[/dim]")
+                    self.hedged_requests += 1
+                    start(models[len(attempts)])
+        finally:
+            if not winner:
+                for attempt in attempts:
+                    attempt.cancel()
+
+        if not winner:
+            raise attempts[0].error
+        won = winner[0]
+        now = time.monotonic()
+        for attempt in attempts:
+            if attempt is not won:
+                if not attempt.done.is_set():
+                    # Still silent when cancelled: its true latency is at least this long
+                    latency.record(attempt.model, now - attempt.started)
+                attempt.cancel()
+        won.done.wait()
+        if won.error:
+            raise won.error
+        return won.model, won.result
+
+    def _request_completion(self, payload, error_label="API Error", on_delta=None):
+        """
+        Send a chat completion, retrying once without tool_choice on a 400.
+        Returns the response JSON, or None after reporting the error.
+        """
+        try:
+            return self._post_chat(payload, on_delta)
+        except requests.exceptions.HTTPError as e:
+            response = e.response
+            status = response.status_code if response is not None else None
+            if status == 400 and "tool_choice" in payload:
+                self.console.print("[yellow]⚠️  Tool choice parameter causing issues, retrying without it...[/yellow]")
+                payload_retry = payload.copy()
+                del payload_retry["tool_choice"]
+                return self._request_completion(payload_retry, error_label, on_delta)
+            # Print detailed error info for debugging
+            try:
+                error_msg = response.json().get('error', {}).get('message', str(e))
+            except (ValueError, KeyError, AttributeError):
+                error_msg = str(e)
+            error = f"{error_label} ({status}): {error_msg}" if status else f"{error_label}: {error_msg}"
+        except requests.exceptions.RequestException as e:
+            error = f"{error_label}: {e}"
+        self.console.print(f"[bold red]{error}[/bold red]")
+        self.last_error = error
+        return None
+
+    def _route(self, step, tool_errors=False):
+        """Pick the model for the next request of a turn (see ModelRouter)."""
+        strong = self.config.get_model()
+        model, reason = self.router.choose(step, strong, tool_errors)
+        if self.router.active:
+            self.router.routed[model] += 1
+            if model != strong:
+                self.tool_output.note(f"[dim]   ↪ {reason} routed to {model}[/dim]")  # In order with tool output
+            elif self.config.debug:
+                self.console.print(f"[dim]Debug: Routed to {model} ({reason})[/dim]")
+        return model
+
+    def _request_routed(self, payload, error_label="API Error", on_delta=None, on_retry=None):
+        """
+        Like _request_completion, but a failed fast-tier request is retried
+        once on the strong model. on_retry is called first, so the caller can
+        finish any partly shown reply and start a fresh one.
+        """
+        data = self._request_completion(payload, error_label, on_delta)
+        strong = self.config.get_model()
+        if data is None and payload["model"] != strong:
+            self.router.record_failure(payload["model"])
+            if on_retry:
+                on_retry()
+            self.console.print(f"[yellow]↪ Retrying with {strong}...[/yellow]")
+            data = self._request_completion(dict(payload, model=strong), error_label, on_delta)
+            if data is not None:
+                self.last_error = None
+        return data
+
+    def send_chat_request(self, message, allow_follow_through=True):
+        """
+        Send a chat request to the OpenRouter API and handle tool execution.
+        Returns the final AI message content, or None if the request failed.
+        """
+        try:
+            return self._send_chat_request(message, allow_follow_through)
+        finally:
+            self.tool_output.flush()  # Don't let tool output run into the next prompt
+
+    def _send_chat_request(self, message, allow_follow_through):
+        self.last_error = None
+        budget_error = self._check_budget()
+        if budget_error:
+            self.console.print(f"[bold red]⚠️  {budget_error}. Use /reset to start over.[/bold red]")
+            self.last_error = budget_error
+            return None
 
-    def send_chat_request(self, message):
-        """Send a chat request to the OpenRouter API and handle tool execution."""
         self.conversation_history.append({"role": "user", "content": message})
         
         # Add system message for agent mode if not already present
         if self.config.agent_mode and (not self.conversation_history or 
                                      self.conversation_history[0].get("role") != "system"):
-            system_message = {
-                "role": "system", 
-                "content": "You are a helpful coding assistant with access to file system tools. You can list files, read files, write files, execute Python scripts, create directories, and delete files. Use these tools when the user asks you to work with files or code. Always explain what you're doing before using tools. IMPORTANT: When you promise to use a tool (like 'let me check the files' or 'I'll read that file'), you MUST actually call the appropriate tool function. Don't just say you will do something - actually do it by calling the function."
-            }
-            self.conversation_history.insert(0, system_message)
+            self.conversation_history.insert(0, {"role": "system", "content": AGENT_SYSTEM_PROMPT})
         
+        # An empty message continues a tool workflow, so it is routed like a follow-up
+        model = self._route("prompt" if message else "follow_up")
         payload = {
-            "model": self.config.get_model(),
+            "model": model,
             "messages": self.conversation_history,
-            "stream": False,  # Disable streaming for function calls
         }
         
         # Add tools if in agent mode
         if self.config.agent_mode:
             # Check if the model supports function calling
-            model_id = self.config.get_model().lower()
-            
-            # More comprehensive model compatibility check
-            function_calling_models = [
-                'gpt-4', 'gpt-3.5-turbo', 'gpt-4-turbo', 'gpt-4o',
-                'claude-3', 'claude-3.5', 'claude-2',
-                'gemini-pro', 'gemini-1.5', 'gemini-flash',
-                'mistral-large', 'mistral-medium', 'mixtral',
-                'llama-3', 'llama-3.1', 'llama-3.2'
-            ]
-            supports_functions = any(model in model_id for model in function_calling_models)
-            
-            if supports_functions:
+            if supports_function_calling(model):
                 payload["tools"] = TOOLS_DEFINITIONS
                 payload["tool_choice"] = "auto"
             else:
-                console.print(f"[yellow]⚠️  Model '{self.config.get_model()}' may not support function calling. Consider using gpt-4o, claude-3, or another compatible model.[/yellow]")
+                self.console.print(f"[yellow]⚠️  Model '{model}' may not support function calling. Consider using gpt-4o, claude-3, or another compatible model.[/yellow]")
 
         if self.config.debug:
-            console.print(f"[dim]Debug: Sending request to {self.api_base}/chat/completions[/dim]")
-            console.print(f"[dim]Debug: Model = {payload.get('model')}, Agent mode = {self.config.agent_mode}[/dim]")
+            self.console.print(f"[dim]Debug: Sending request to {self.api_base}/chat/completions[/dim]")
+            self.console.print(f"[dim]Debug: Model = {payload.get('model')}, Agent mode = {self.config.agent_mode}[/dim]")
             if 'tools' in payload:
-                console.print(f"[dim]Debug: Including {len(payload['tools'])} tools[/dim]")
+                self.console.print(f"[dim]Debug: Including {len(payload['tools'])} tools[/dim]")
+
+        renderer = detector = None
+
+        def start_reply():
+            # Also called when a failed fast-tier reply is retried, so the strong model's reply starts clean
+            nonlocal renderer, detector
+            if renderer is not None:
+                renderer.close()
+            renderer = IncrementalMarkdownRenderer(self.console, before_output=self.tool_output.flush)
+            detector = PromiseDetector()
 
+        def on_delta(text):
+            renderer.feed(text)
+            detector.feed(text)
+
+        start_reply()
+        self._prefetch()
         try:
-            response = requests.post(
-                f"{self.api_base}/chat/completions",
-                headers=self.headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 400:
-                # Try again without tool_choice if it's a 400 error in agent mode
-                if self.config.agent_mode and "tool_choice" in payload:
-                    console.print("[yellow]⚠️  Tool choice parameter causing issues, retrying without it...[/yellow]")
-                    payload_retry = payload.copy()
-                    del payload_retry["tool_choice"]
-                    
-                    response = requests.post(
-                        f"{self.api_base}/chat/completions",
-                        headers=self.headers,
-                        json=payload_retry
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                else:
-                    # Print detailed error info for debugging
-                    try:
-                        error_data = response.json()
-                        error_msg = error_data.get('error', {}).get('message', str(e))
-                        console.print(f"[bold red]API Error (400): {error_msg}[/bold red]")
-                    except (ValueError, KeyError, AttributeError):
-                        console.print(f"[bold red]API Error (400): {e}[/bold red]")
-                    self.conversation_history.pop() # remove user message if request failed
-                    return
-            else:
-                raise
-        except requests.exceptions.RequestException as e:
-            console.print(f"[bold red]API Error: {e}[/bold red]")
+            data = self._request_routed(payload, on_delta=on_delta, on_retry=start_reply)
+        finally:
+            renderer.close()
+            detector.close()
+        if data is None:
             self.conversation_history.pop() # remove user message if request failed
-            return
+            return None
 
         # Handle usage stats
-        if "usage" in data:
-            self.total_tokens += data['usage']['total_tokens']
+        self._record_usage(data)
         
         ai_message = data['choices'][0]['message']
         ai_content = ai_message.get('content', '')
@@ -201,12 +509,12 @@ class ChatClient:
             
             # Limit the number of tool calls for safety
             if num_tools > self.config.max_tool_calls:
-                console.print(f"[bold red]⚠️  Too many tool calls requested ({num_tools}). Limiting to {self.config.max_tool_calls}.[/bold red]")
+                self.console.print(f"[bold red]⚠️  Too many tool calls requested ({num_tools}). Limiting to {self.config.max_tool_calls}.[/bold red]")
                 tool_calls = tool_calls[:self.config.max_tool_calls]
                 num_tools = len(tool_calls)
             
             execution_mode = self.config.tool_execution_mode
-            console.print(f"[bold cyan]🤖 Assistant is using {num_tools} tool(s) in {execution_mode} mode...[/bold cyan]")
+            self.console.print(f"[bold cyan]🤖 Assistant is using {num_tools} tool(s) in {execution_mode} mode...[/bold cyan]")
             
             self.conversation_history.append(ai_message)
             
@@ -217,56 +525,31 @@ class ChatClient:
                 # Execute tools sequentially
                 self._execute_tools_sequential(tool_calls)
                 
-            # Get final response after tool execution
+            # Get final response after tool execution, from the fast tier unless a tool failed
+            tool_errors = any(str(m.content).startswith("❌") for m in self.conversation_history[-num_tools:])
+            model = self._route("follow_up", tool_errors)
             final_payload = {
-                "model": self.config.get_model(),
+                "model": model,
                 "messages": self.conversation_history,
-                "stream": False,
             }
             
             # Only add tools if the model supports them
-            model_id = self.config.get_model().lower()
+            model_id = model.lower()
             supports_functions = any(x in model_id for x in ['gpt-4', 'gpt-3.5', 'claude', 'gemini'])
             if supports_functions:
                 final_payload["tools"] = TOOLS_DEFINITIONS
                 final_payload["tool_choice"] = "auto"
             
+            start_reply()
+            self._prefetch()
             try:
-                final_response = requests.post(
-                    f"{self.api_base}/chat/completions",
-                    headers=self.headers,
-                    json=final_payload
-                )
-                final_response.raise_for_status()
-                final_data = final_response.json()
-            except requests.exceptions.HTTPError as e:
-                if final_response.status_code == 400:
-                    # Try again without tool_choice if it's a 400 error
-                    console.print("[yellow]⚠️  Tool choice parameter causing issues in final call, retrying without it...[/yellow]")
-                    final_payload_retry = final_payload.copy()
-                    if "tool_choice" in final_payload_retry:
-                        del final_payload_retry["tool_choice"]
-                    
-                    try:
-                        final_response = requests.post(
-                            f"{self.api_base}/chat/completions",
-                            headers=self.headers,
-                            json=final_payload_retry
-                        )
-                        final_response.raise_for_status()
-                        final_data = final_response.json()
-                    except requests.exceptions.RequestException as retry_e:
-                        console.print(f"[bold red]API Error in final call retry: {retry_e}[/bold red]")
-                        return
-                else:
-                    console.print(f"[bold red]API Error in final call: {e}[/bold red]")
-                    return
-            except requests.exceptions.RequestException as e:
-                console.print(f"[bold red]API Error in final call: {e}[/bold red]")
-                return
+                final_data = self._request_routed(final_payload, "API Error in final call", on_delta, start_reply)
+            finally:
+                renderer.close()
+            if final_data is None:
+                return None
             
-            if "usage" in final_data:
-                self.total_tokens += final_data['usage']['total_tokens']
+            self._record_usage(final_data)
             
             final_message = final_data['choices'][0]['message']
             final_content = final_message.get('content', '')
@@ -274,171 +557,296 @@ class ChatClient:
             # Check if AI wants to use more tools in the final response
             if final_message.get('tool_calls'):
                 # Handle additional tool calls if needed (recursive case)
-                console.print("[yellow]⚠️  AI wants to use more tools in response. This might indicate a complex workflow.[/yellow]")
+                self.console.print("[yellow]⚠️  AI wants to use more tools in response. This might indicate a complex workflow.[/yellow]")
                 self.conversation_history.append(final_message)
                 return self.send_chat_request("")  # Continue with empty message to process additional tools
             else:
                 # Display the final AI response
                 self.conversation_history.append(final_message)
-                if final_content:
-                    console.print("[bold blue]AI:[/bold blue]")
-                    markdown_content = Markdown(final_content)
-                    console.print(markdown_content)
-                else:
-                    console.print("[bold blue]AI:[/bold blue] [italic]AI provided tool results but no additional commentary.[/italic]")
+                if not renderer.has_output:
+                    self.console.print("[bold blue]AI:[/bold blue] [italic]AI provided tool results but no additional commentary.[/italic]")
+                return final_content
                 
         else:
-            # AI didn't call tools - check if it promised to use any
-            if self.config.agent_mode and ai_content:
-                promised_tools = self._detect_promised_but_uncalled_tools(ai_content)
-                
-                if promised_tools:
-                    console.print(f"[bold yellow]⚠️  AI promised to use tools but didn't call them: {', '.join(promised_tools)}[/bold yellow]")
-                    console.print("[yellow]This might be an AI oversight. The response was provided without tool execution.[/yellow]")
-                    
-                    # Ask user if they want to retry
-                    retry = console.input("[bold]Would you like me to ask the AI to actually follow through? (y/N): [/bold]").lower().strip()
-                    
-                    if retry == 'y':
-                        # Don't add the problematic AI message to history yet
-                        # Add a follow-up message to encourage tool use
-                        follow_up = "Please actually follow through with the tools you mentioned. Don't just describe what you would do - actually call the appropriate functions to perform the actions you promised."
-                        console.print("[dim]Asking AI to follow through with promised actions...[/dim]")
-                        return self.send_chat_request(follow_up)
-            
             # Add AI message to conversation and display it
             self.conversation_history.append(ai_message)
-            if ai_content:
-                console.print("[bold blue]AI:[/bold blue]")
-                markdown_content = Markdown(ai_content)
-                console.print(markdown_content)
-            else:
-                console.print("[bold blue]AI:[/bold blue] [italic]AI sent an empty response.[/italic]")
+            if not renderer.has_output:
+                self.console.print("[bold blue]AI:[/bold blue] [italic]AI sent an empty response.[/italic]")
+
+            # AI didn't call tools - check if it promised to use any (detected while streaming)
+            policy = self._follow_through_policy()
+            if self.config.agent_mode and detector.promises and allow_follow_through and policy != "off":
+                self.console.print(f"[bold yellow]⚠️  AI promised to use tools but didn't call them: {', '.join(detector.promises)}[/bold yellow]")
+
+                if policy == "ask":
+                    self.console.print("[yellow]This might be an AI oversight. The response was provided without tool execution.[/yellow]")
+                    retry = self.console.input("[bold]Would you like me to ask the AI to actually follow through? (y/N): [/bold]").lower().strip()
+                else:
+                    retry = 'y'
+
+                if retry == 'y':
+                    # The reply stays in history so the AI can see what it promised; only one follow-up per turn
+                    follow_up = "Please actually follow through with the tools you mentioned. Don't just describe what you would do - actually call the appropriate functions to perform the actions you promised."
+                    self.console.print("[dim]Asking AI to follow through with promised actions...[/dim]")
+                    result = self.send_chat_request(follow_up, allow_follow_through=False)
+                    return result if result is not None else ai_content
+            return ai_content
+
+    def compare_models(self, prompt, models):
+        """
+        Send one prompt, with the current history, to several models at once
+        over the shared connection pool. Returns a result dict per model
+        (model, content, tool_calls, latency, usage, cost, error) in the order
+        given. Nothing is added to the conversation, but tokens and cost
+        count towards its totals and budgets. Returns None, after reporting
+        it, if the budget is already exhausted.
+        """
+        self.last_error = None
+        budget_error = self._check_budget()
+        if budget_error:
+            self.console.print(f"[bold red]⚠️  {budget_error}. Use /reset to start over.[/bold red]")
+            self.last_error = budget_error
+            return None
+
+        messages = list(self.conversation_history)
+        if self.config.agent_mode and (not messages or messages[0].get("role") != "system"):
+            messages.insert(0, Message("system", AGENT_SYSTEM_PROMPT))
+        messages.append(Message("user", prompt))
+
+        def run(model):
+            result = {"model": model, "content": None, "tool_calls": [], "latency": None,
+                      "usage": {}, "cost": 0.0, "error": None}
+            attempt = Attempt(model)
+            payload = {"model": model, "messages": messages}
+            raw_fields = None
+            # Tools only for models that support them, as in a normal turn
+            if self.config.agent_mode and supports_function_calling(model):
+                payload["tools"] = TOOLS_DEFINITIONS
+                payload["tool_choice"] = "auto"
+                raw_fields = {"tools": TOOLS_JSON}
+            try:
+                body = self._stream_body(encode_payload(payload, raw_fields), False)
+                data = self._post_once(attempt, body, False, None,
+                                       lambda: self.shared.latency.record(model, time.monotonic() - attempt.started))
+                message = data['choices'][0]['message']
+                result["content"] = message.get('content') or ""
+                result["tool_calls"] = [c['function']['name'] for c in message.get('tool_calls') or []]
+                result["usage"] = data.get("usage") or {}
+                result["cost"] = self._estimate_cost(result["usage"], model) if result["usage"] else 0.0
+            except requests.exceptions.HTTPError as e:
+                try:
+                    result["error"] = e.response.json().get('error', {}).get('message', str(e))
+                except (ValueError, AttributeError):
+                    result["error"] = str(e)
+            except (requests.exceptions.RequestException, KeyError, IndexError, ValueError) as e:
+                result["error"] = str(e)
+            result["latency"] = time.monotonic() - attempt.started
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(models)) as executor:
+            results = list(executor.map(run, models))
+        for result in results:
+            if result["usage"]:
+                self._record_usage({"usage": result["usage"]}, result["model"])
+        return results
 
     def _execute_single_tool(self, tool_call):
-        """Execute a single tool call and return the result."""
+        """
+        Execute a single tool call. Returns (message, execution_time), where
+        message is the tool result Message for the history and execution_time
+        is None if the tool could not be run.
+        """
         function_name = tool_call['function']['name']
         function_to_call = AVAILABLE_TOOLS.get(function_name)
+        execution_time = None
         
         if not function_to_call:
-            return {
-                "tool_call_id": tool_call['id'],
-                "role": "tool",
-                "name": function_name,
-                "content": f"❌ Error: Tool '{function_name}' not found.",
-            }
+            content = f"❌ Error: Tool '{function_name}' not found."
+        else:
+            try:
+                function_args = json.loads(tool_call['function']['arguments'])
+                start_time = time.time()
+                content = function_to_call(**function_args)
+                execution_time = time.time() - start_time
+            except json.JSONDecodeError as e:
+                content = f"❌ Error parsing arguments: {e}"
+            except Exception as e:
+                content = f"❌ Error executing tool: {e}"
         
-        try:
-            function_args = json.loads(tool_call['function']['arguments'])
-            start_time = time.time()
-            function_response = function_to_call(**function_args)
-            execution_time = time.time() - start_time
-            
-            return {
-                "tool_call_id": tool_call['id'],
-                "role": "tool", 
-                "name": function_name,
-                "content": function_response,
-                "execution_time": execution_time,
-                "args": function_args
-            }
-        except json.JSONDecodeError as e:
-            return {
-                "tool_call_id": tool_call['id'],
-                "role": "tool",
-                "name": function_name,
-                "content": f"❌ Error parsing arguments: {e}",
-            }
-        except Exception as e:
-            return {
-                "tool_call_id": tool_call['id'],
-                "role": "tool",
-                "name": function_name,
-                "content": f"❌ Error executing tool: {e}",
-            }
+        message = Message("tool", content, name=function_name, tool_call_id=tool_call['id'])
+        return message, execution_time
 
     def _execute_tools_sequential(self, tool_calls):
         """Execute tools one after another in sequence."""
         for i, tool_call in enumerate(tool_calls, 1):
             function_name = tool_call['function']['name']
-            console.print(f"   🔧 [{i}/{len(tool_calls)}] Calling `{function_name}`...")
+            self.tool_output.note(f"   🔧 [{i}/{len(tool_calls)}] Calling `{function_name}`...")
+            if may_prompt(function_name):
+                self.tool_output.flush()  # So queued output doesn't land on the confirmation prompt
             
-            result = self._execute_single_tool(tool_call)
+            message, execution_time = self._execute_single_tool(tool_call)
             
-            # Display result
-            if "execution_time" in result:
-                console.print(f"   📋 Tool response ({result['execution_time']:.2f}s): {result['content']}")
+            # Display result (in the background, so a huge result doesn't hold up the loop)
+            if execution_time is not None:
+                self.tool_output.submit(function_name, f"   📋 Tool response ({execution_time:.2f}s): ", message.content)
             else:
-                console.print(f"   📋 Tool response: {result['content']}")
+                self.tool_output.submit(function_name, "   📋 Tool response: ", message.content)
             
             # Add to conversation history
-            self.conversation_history.append({
-                "tool_call_id": result["tool_call_id"],
-                "role": result["role"],
-                "name": result["name"],
-                "content": result["content"],
-            })
+            self._append_tool_result(message)
 
     def _execute_tools_parallel(self, tool_calls):
         """Execute tools in parallel using threading."""
-        console.print("   ⚡ Executing tools in parallel...")
+        self.tool_output.flush()  # Earlier output must not draw over the progress bar
+        self.console.print("   ⚡ Executing tools in parallel...")
+        results = [None] * len(tool_calls)
         
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TaskProgressColumn(),
-            console=console,
+            console=self.console,
             transient=True
         ) as progress:
             
             task = progress.add_task("Running tools...", total=len(tool_calls))
             
             with ThreadPoolExecutor(max_workers=min(len(tool_calls), 5)) as executor:
-                # Submit all tool calls
-                future_to_tool = {
-                    executor.submit(self._execute_single_tool, tool_call): tool_call 
-                    for tool_call in tool_calls
+                # Submit all tool calls, remembering their original position
+                future_to_index = {
+                    executor.submit(self._execute_single_tool, tool_call): i
+                    for i, tool_call in enumerate(tool_calls)
                 }
                 
-                completed_results = []
-                
                 # Collect results as they complete
-                for future in as_completed(future_to_tool):
-                    tool_call = future_to_tool[future]
-                    result = future.result()
-                    completed_results.append(result)
+                for future in as_completed(future_to_index):
+                    message, execution_time = future.result()
+                    results[future_to_index[future]] = message
                     
-                    function_name = tool_call['function']['name']
-                    if "execution_time" in result:
-                        console.print(f"   ✅ `{function_name}` completed ({result['execution_time']:.2f}s)")
+                    if execution_time is not None:
+                        self.console.print(f"   ✅ `{message.name}` completed ({execution_time:.2f}s)")
                     else:
-                        console.print(f"   ✅ `{function_name}` completed")
+                        self.console.print(f"   ✅ `{message.name}` completed")
                     
                     progress.advance(task)
         
-        # Sort results by original order and add to conversation
-        tool_call_ids = [tc['id'] for tc in tool_calls]
-        sorted_results = sorted(completed_results, key=lambda r: tool_call_ids.index(r['tool_call_id']))
-        
-        console.print("\n   📋 Tool Results:")
-        for i, result in enumerate(sorted_results, 1):
-            console.print(f"   {i}. {result['name']}: {result['content']}")
-            
-            # Add to conversation history
-            self.conversation_history.append({
-                "tool_call_id": result["tool_call_id"],
-                "role": result["role"],
-                "name": result["name"],
-                "content": result["content"],
-            })
+        # Add results to the conversation in the original call order
+        self.console.print("\n   📋 Tool Results:")
+        for i, message in enumerate(results, 1):
+            self.tool_output.submit(message.name, f"   {i}. {message.name}: ", message.content)
+            self._append_tool_result(message)
+
+    @staticmethod
+    def _fingerprint(content):
+        if not isinstance(content, str) or len(content) < DEDUPE_MIN_CHARS:
+            return None
+        return hashlib.sha256(content.encode("utf-8", "surrogatepass")).digest()
+
+    def _index_tool_results(self):
+        """Rebuild the tool output fingerprints from the current history."""
+        self._tool_results = {}
+        for message in self.conversation_history:
+            if message.role == "tool":
+                digest = self._fingerprint(message.content)
+                if digest is not None:
+                    self._tool_results.setdefault(digest, message)
+
+    def _append_tool_result(self, message):
+        """
+        Add a tool result to the history. Output byte-identical to an earlier
+        tool result that is still in the history is stored as a short
+        back-reference to that message, so re-reading an unchanged file does
+        not re-send it with every later request.
+        """
+        digest = self._fingerprint(message.content) if self.config.dedupe_tool_results else None
+        if digest is not None:
+            if self._tool_results is None:
+                self._index_tool_results()  # Forked branch: index its shared history on first use
+            earlier = self._tool_results.get(digest)
+            if earlier is not None and any(m is earlier for m in self.conversation_history):
+                reference = (f"♻️ Output unchanged: identical to the earlier `{earlier.name}` result "
+                             f"(tool call {earlier.tool_call_id}, {len(message.content):,} characters) shown above.")
+                self.deduplicated_results += 1
+                self.deduplicated_chars += len(message.content) - len(reference)
+                message = Message("tool", reference, name=message.name, tool_call_id=message.tool_call_id)
+            else:
+                self._tool_results[digest] = message
+        self.conversation_history.append(message)
+
+    def fork(self):
+        """
+        Return a new client that continues this conversation independently,
+        with its own config copy and stats. The history is shared structurally
+        rather than copied, so forking takes constant time at any length. The
+        fork is not persisted to the conversation store.
+        """
+        branch = ChatClient(copy.copy(self.config), console=self.console, shared=self.shared)
+        branch.conversation_history = self.conversation_history.fork()
+        branch._tool_results = None
+        return branch
+
+    def set_console(self, console):
+        """Send this client's output (replies, tool results) to another console."""
+        self.tool_output.flush()
+        self.console = console
+        self.tool_output.console = console
+
+    @property
+    def session_id(self):
+        """Id of the persisted session, or None when persistence is off."""
+        return self.session_log.session_id if self.session_log else None
+
+    def enable_persistence(self, store):
+        """Persist this conversation to a ConversationStore as a new session."""
+        self.store = store
+        self._start_session_log()
+
+    def _start_session_log(self):
+        self.session_log = self.store.create_session(model=self.config.get_model())
+        self.conversation_history.listeners.append(self.session_log)
+
+    def _detach_session_log(self):
+        if self.session_log:
+            self.conversation_history.listeners.remove(self.session_log)
+            self.session_log.close(len(self.conversation_history))
+            self.session_log = None
+
+    def resume_session(self, session_id):
+        """
+        Replace the current conversation with a persisted session and return
+        its message count. Raises KeyError if the session doesn't exist.
+        """
+        messages, log = self.store.load_session(session_id)
+        self._detach_session_log()
+        self.conversation_history = ConversationHistory(messages)
+        self.session_log = log
+        self.conversation_history.listeners.append(log)
+        self._index_tool_results()
+        return len(messages)
+
+    def close(self):
+        """Flush and close the persisted session log, if any, and save latency measurements."""
+        self.tool_output.flush()
+        self._detach_session_log()
+        self.shared.latency.save()
 
     def reset_conversation(self):
-        """Reset conversation history and stats."""
-        self.conversation_history = []
+        """Reset conversation history and stats. A persisted session stays resumable."""
+        self._detach_session_log()
+        self.conversation_history = ConversationHistory()
+        if self.store:
+            self._start_session_log()
         self.total_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
         self.total_cost = 0.0
-        console.print("[bold yellow]Conversation history reset.[/bold yellow]")
+        self.cache_hits = 0
+        self.hedged_requests = 0
+        self.deduplicated_results = 0
+        self.deduplicated_chars = 0
+        self._tool_results = {}
+        self.console.print("[bold yellow]Conversation history reset.[/bold yellow]")
 
     def show_stats(self):
         """Display conversation statistics."""
@@ -455,5 +863,33 @@ class ChatClient:
             table.add_row("Max Tool Calls", str(self.config.max_tool_calls))
         table.add_row("Total Tokens", str(self.total_tokens))
         table.add_row("Estimated Cost", f"${self.total_cost:.6f}")
+        if self.config.token_budget is not None:
+            table.add_row("Token Budget", f"{self.total_tokens}/{self.config.token_budget}")
+        if self.config.cost_budget is not None:
+            table.add_row("Cost Budget", f"${self.total_cost:.4f}/${self.config.cost_budget:.4f}")
         table.add_row("History Length", f"{len(self.conversation_history)} messages")
-        console.print(table)
\ No newline at end of file
+        if self.shared.response_cache:
+            table.add_row("Cached Responses", str(self.cache_hits))
+            cache = self.shared.response_cache.stats()
+            table.add_row("Response Cache", f"{cache['entries']} entries, {cache['bytes'] / 1024 / 1024:.1f} MB, "
+                                            f"{cache['hits']} hits / {cache['misses']} misses this run")
+        limiter = self.shared.rate_limiter
+        if limiter.throttled:
+            table.add_row("Rate Limited (429)", f"{limiter.throttled} response(s), concurrency limit {int(limiter.concurrency.limit)}")
+        p50 = self.shared.latency.percentile(self.config.get_model(), 50)
+        if p50 is not None:
+            p95 = self.shared.latency.percentile(self.config.get_model(), 95)
+            table.add_row("First Byte (p50/p95)", f"{p50:.2f}s / {p95:.2f}s")
+        if self.config.fallback_models:
+            table.add_row("Fallback Models", ", ".join(self.config.fallback_models))
+            table.add_row("Hedged Requests", str(self.hedged_requests))
+        if self.router.active:
+            routed = ", ".join(f"{model} ({count})" for model, count in self.router.routed.most_common())
+            table.add_row("Routed Requests", routed or "none yet")
+        if self.deduplicated_results:
+            table.add_row("Deduplicated Tool Results", f"{self.deduplicated_results} ({self.deduplicated_chars:,} chars saved)")
+        if self.config.agent_mode and self.shared.prefetcher:
+            table.add_row("Prefetched Files", f"{self.shared.prefetcher.prefetched} ({self.shared.file_cache.prefetch_hits} used)")
+        if self.session_id:
+            table.add_row("Session", self.session_id)
+        self.console.print(table)
\ No newline at end of file
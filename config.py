@@ -7,12 +7,42 @@ class Config:
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.app_url = os.getenv("APP_URL", "https://github.com/PierrunoYT/ai-coding-cli")
         self.app_name = os.getenv("APP_NAME", "AI Chat CLI (Python)")
+        self.api_base = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
         self.default_model = "openai/gpt-4o"
         self.model = self.default_model
         self.agent_mode = False  # Toggle for coding agent mode
         self.tool_execution_mode = "sequential"  # "sequential" or "parallel"
         self.max_tool_calls = 10  # Maximum tool calls per response
+        self.token_budget = None  # Optional per-conversation token limit
+        self.cost_budget = None  # Optional per-conversation USD limit
         self.debug = os.getenv("DEBUG", "false").lower() == "true"  # Debug mode
+        self.stream = os.getenv("STREAM", "true").lower() == "true"  # Stream replies as they are generated
+        self.prefetch = os.getenv("PREFETCH", "true").lower() == "true"  # Warm files mentioned in the chat during requests
+        self.dedupe_tool_results = os.getenv("DEDUPE_TOOL_RESULTS", "true").lower() == "true"  # Back-reference repeated tool output
+        rpm = os.getenv("RATE_LIMIT_RPM")
+        self.requests_per_minute = float(rpm) if rpm else None  # None = learn limits from response headers
+        self.max_concurrent_requests = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+        self.max_retries = int(os.getenv("MAX_RETRIES", "5"))  # Retries for 429/5xx responses
+        self.connect_timeout = float(os.getenv("CONNECT_TIMEOUT", "10"))  # Seconds
+        self.request_timeout = float(os.getenv("REQUEST_TIMEOUT", "120"))  # Max seconds between bytes of a reply
+        self.max_background_jobs = int(os.getenv("MAX_BACKGROUND_JOBS", "2"))  # Scripts running at once as background jobs
+        # Models raced against a slow primary model, in order (empty = no hedging)
+        self.fallback_models = [m.strip() for m in os.getenv("FALLBACK_MODELS", "").split(",") if m.strip()]
+        self.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "95"))  # Of measured time to first byte
+        self.hedge_delay = float(os.getenv("HEDGE_DELAY", "10"))  # Seconds, until a model has enough measurements
+        # Fast, cheap models for follow-up requests after tool results (empty = always use the selected model)
+        self.fast_models = [m.strip() for m in os.getenv("FAST_MODELS", "").split(",") if m.strip()]
+        self.routing = os.getenv("ROUTING", "true").lower() == "true"  # Route follow-ups to fast_models
+        self.response_cache = os.getenv("RESPONSE_CACHE", "false").lower() == "true"  # Opt-in completion cache
+        self.response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 86400)))  # Seconds
+        self.response_cache_max_mb = float(os.getenv("RESPONSE_CACHE_MAX_MB", "256"))
+        self.interactive = True  # False for headless runs (no console prompts)
+        # What to do when the AI promises a tool call but doesn't make it: "ask", "auto" or "off"
+        self.promise_policy = os.getenv("PROMISE_POLICY", "ask").lower()
+        self.data_dir = os.getenv("AI_CLI_HOME", os.path.join(os.path.expanduser("~"), ".ai-coding-cli"))
+        self.persist_history = os.getenv("PERSIST_HISTORY", "true").lower() == "true"
+        max_age = os.getenv("SESSION_MAX_AGE_DAYS")
+        self.session_max_age_days = float(max_age) if max_age else None  # None keeps sessions forever
 
     def get_model(self):
         """Get the current model."""
@@ -35,6 +65,13 @@ class Config:
             self.tool_execution_mode = "sequential"
         return self.tool_execution_mode
     
+    def set_promise_policy(self, policy):
+        """Set the follow-through policy for promised but uncalled tools."""
+        if policy in ("ask", "auto", "off"):
+            self.promise_policy = policy
+            return True
+        return False
+
     def set_max_tool_calls(self, max_calls):
         """Set the maximum number of tool calls per response (1-20)."""
         if max_calls > 0 and max_calls <= 20:
@@ -0,0 +1,219 @@
+import json
+
+# Standard chat message fields; anything else the API returns is kept in Message.extra
+MESSAGE_FIELDS = ("role", "content", "name", "tool_call_id", "tool_calls")
+
+
+class Message:
+    """
+    One chat message. Messages are treated as immutable once created, which
+    lets the JSON encoding be computed once and reused for every later request
+    and for the persisted log.
+    """
+
+    __slots__ = ("role", "content", "name", "tool_call_id", "tool_calls", "extra", "_json")
+
+    def __init__(self, role, content=None, name=None, tool_call_id=None, tool_calls=None, extra=None):
+        self.role = role
+        self.content = content
+        self.name = name
+        self.tool_call_id = tool_call_id
+        self.tool_calls = tool_calls
+        self.extra = extra
+        self._json = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Message from an API-style dict (returned as-is if already a Message)."""
+        if isinstance(data, Message):
+            return data
+        extra = {k: v for k, v in data.items() if k not in MESSAGE_FIELDS}
+        return cls(data.get("role"), data.get("content"), data.get("name"),
+                   data.get("tool_call_id"), data.get("tool_calls"), extra or None)
+
+    def to_dict(self):
+        """Return the message as an API-style dict, omitting unset fields."""
+        data = dict(self.extra) if self.extra else {}
+        data["role"] = self.role
+        data["content"] = self.content
+        for field in ("name", "tool_call_id", "tool_calls"):
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    def json_bytes(self):
+        """Return the canonical UTF-8 JSON encoding, computed on first use."""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"),
+                                    ensure_ascii=False).encode("utf-8")
+        return self._json
+
+    def get(self, key, default=None):
+        """Dict-style field access, for code written against plain message dicts."""
+        if key in MESSAGE_FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+def encode_payload(payload, raw_fields=None):
+    """
+    Encode a chat request body as canonical JSON bytes. The "messages" entry is
+    spliced together from each message's cached encoding instead of
+    re-encoding the whole history; `raw_fields` maps other field names to
+    already-encoded JSON bytes (e.g. the constant tool definitions).
+    """
+    raw_fields = raw_fields or {}
+    fields = {k: v for k, v in payload.items() if k != "messages" and k not in raw_fields}
+    parts = [
+        b'"' + name.encode("utf-8") + b'":' + json.dumps(value, sort_keys=True, separators=(",", ":"),
+                                                          ensure_ascii=False).encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.extend(b'"' + name.encode("utf-8") + b'":' + value for name, value in raw_fields.items())
+    messages = payload.get("messages", ())
+    parts.append(b'"messages":[' + b",".join(Message.from_dict(m).json_bytes() for m in messages) + b"]")
+    return b"{" + b",".join(sorted(parts)) + b"}"
+
+
+class _Node:
+    """One link of an immutable message chain; chains share every node before the point they diverge."""
+
+    __slots__ = ("message", "parent", "depth")
+
+    def __init__(self, message, parent):
+        self.message = message
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 1
+
+
+class ConversationHistory:
+    """
+    Ordered list of chat messages that notifies listeners of every change.
+    Messages are stored as Message objects; plain dicts are converted on the way in.
+
+    Listeners (e.g. a ConversationLog) receive on_append, on_insert, on_pop and
+    on_clear calls, so they can record each mutation incrementally instead of
+    re-serializing the whole history.
+
+    The messages form a persistent linked chain from the newest message back
+    to the first, so `fork()` is constant time and memory: a fork and its
+    original share their common prefix, and appending to either never affects
+    the other. Appending and popping the last message are O(1); inserting or
+    removing earlier messages re-links only the messages after that point.
+    """
+
+    def __init__(self, messages=None):
+        self._tip = None
+        for m in messages or ():
+            self._tip = _Node(Message.from_dict(m), self._tip)
+        self.listeners = []
+
+    def fork(self):
+        """Return an independent history with the same messages, sharing them instead of copying."""
+        branch = ConversationHistory()
+        branch._tip = self._tip
+        return branch
+
+    def common_prefix(self, other):
+        """Return how many leading messages this history shares with another (e.g. a fork)."""
+        a, b = self._tip, other._tip
+        while a is not None and b is not None and a is not b:
+            if a.depth >= b.depth:
+                a = a.parent
+            else:
+                b = b.parent
+        return a.depth if a is not None and a is b else 0
+
+    def _relink(self, index, message=None, drop=False):
+        """Rebuild the chain from position `index`: optionally drop that message and/or put `message` there."""
+        suffix = []
+        node = self._tip
+        while node is not None and node.depth > index:
+            suffix.append(node.message)
+            node = node.parent
+        removed = suffix.pop() if drop else None
+        if message is not None:
+            node = _Node(message, node)
+        for m in reversed(suffix):
+            node = _Node(m, node)
+        self._tip = node
+        return removed
+
+    def append(self, message):
+        """Add a message to the end of the history."""
+        message = Message.from_dict(message)
+        self._tip = _Node(message, self._tip)
+        for listener in self.listeners:
+            listener.on_append(message)
+
+    def insert(self, index, message):
+        """Insert a message at the given position."""
+        message = Message.from_dict(message)
+        position = index + len(self) if index < 0 else index
+        self._relink(min(max(position, 0), len(self)), message)
+        for listener in self.listeners:
+            listener.on_insert(index, message)
+
+    def pop(self, index=-1):
+        """Remove and return a message (the last one by default)."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pop index out of range")
+        if index == len(self) - 1:
+            message = self._tip.message
+            self._tip = self._tip.parent
+        else:
+            message = self._relink(index, drop=True)
+        for listener in self.listeners:
+            listener.on_pop(index)
+        return message
+
+    def clear(self):
+        """Remove every message."""
+        self._tip = None
+        for listener in self.listeners:
+            listener.on_clear()
+
+    def _messages(self):
+        messages = []
+        node = self._tip
+        while node is not None:
+            messages.append(node.message)
+            node = node.parent
+        messages.reverse()
+        return messages
+
+    def to_list(self):
+        """Return the messages as a list of plain dicts."""
+        return [m.to_dict() for m in self._messages()]
+
+    def __len__(self):
+        return self._tip.depth if self._tip is not None else 0
+
+    def __iter__(self):
+        return iter(self._messages())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._messages()[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("history index out of range")
+        node = self._tip
+        for _ in range(length - 1 - index):
+            node = node.parent
+        return node.message
+
+    def __bool__(self):
+        return self._tip is not None
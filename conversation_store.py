@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class ConversationLog:
+    """
+    Append-only log for one conversation, attached to a ConversationHistory as
+    a listener. Every mutation is written as a single JSON line the moment it
+    happens, so a crash loses at most the record being written. Messages are
+    written from their cached encoding, so nothing is serialized twice.
+    """
+
+    def __init__(self, store, session_id, model=None, titled=False):
+        self.store = store
+        self.session_id = session_id
+        self.path = store.log_path(session_id)
+        self.model = model
+        self.records = 0
+        self._titled = titled
+        self._file = None
+        self._lock = threading.Lock()
+        self._open = True
+        store._register(session_id)
+
+    def _write(self, line):
+        with self._lock:
+            if self._file is None:
+                # The index entry is only created once the session has content
+                self.store.update_index(self.session_id, model=self.model)
+                self._file = open(self.path, "ab")
+            self._file.write(line)
+            self._file.flush()
+            self.records += 1
+
+    def on_append(self, message):
+        self._write(b'{"op":"append","msg":' + message.json_bytes() + b'}\n')
+        if not self._titled and message.get("role") == "user" and message.get("content"):
+            self._titled = True
+            self.store.update_index(self.session_id, title=message["content"][:80])
+
+    def on_insert(self, index, message):
+        self._write(b'{"op":"insert","index":%d,"msg":' % index + message.json_bytes() + b'}\n')
+
+    def on_pop(self, index):
+        self._write(b'{"op":"pop","index":%d}\n' % index)
+
+    def on_clear(self):
+        self._write(b'{"op":"clear"}\n')
+
+    def close(self, message_count=None):
+        """Flush to disk, close the file and update the session's index entry."""
+        with self._lock:
+            if self._open:
+                self._open = False
+                self.store._unregister(self.session_id)
+            if self._file is None:
+                return
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        self.store.update_index(self.session_id, messages=message_count)
+
+
+class ConversationStore:
+    """
+    Directory of persisted conversations: one append-only JSONL log per session
+    plus a small index.json with per-session metadata. Listing sessions only
+    reads the index; a log is replayed only when that session is resumed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._open_logs = {}  # session id -> ConversationLogs open in this process; these are never compacted
+        self._maintenance_lock = threading.Lock()  # Held while compacting or deleting an old session
+
+    def _register(self, session_id):
+        # Waits for any compaction of this session to finish
+        with self._maintenance_lock:
+            self._open_logs[session_id] = self._open_logs.get(session_id, 0) + 1
+
+    def _unregister(self, session_id):
+        with self._maintenance_lock:
+            self._open_logs[session_id] -= 1
+            if not self._open_logs[session_id]:
+                del self._open_logs[session_id]
+
+    def log_path(self, session_id):
+        """Return the log file path for a session."""
+        return os.path.join(self.directory, f"{session_id}.jsonl")
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def update_index(self, session_id, **fields):
+        """Merge metadata fields into a session's index entry (None values are ignored)."""
+        with self._lock:
+            index = self._load_index()
+            entry = index.setdefault(session_id, {"created": time.time()})
+            entry.update({k: v for k, v in fields.items() if v is not None})
+            entry["updated"] = time.time()
+            self._save_index(index)
+
+    def create_session(self, model=None, session_id=None):
+        """Start a new, empty session and return its ConversationLog."""
+        session_id = session_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        return ConversationLog(self, session_id, model=model)
+
+    def list_sessions(self):
+        """Return index entries (with an "id" key), most recently updated first."""
+        with self._lock:
+            index = self._load_index()
+        sessions = [dict(entry, id=session_id) for session_id, entry in index.items()]
+        return sorted(sessions, key=lambda e: e.get("updated", 0), reverse=True)
+
+    def _replay(self, session_id):
+        """Rebuild a session's messages from its log. Returns (messages, records, valid_bytes)."""
+        messages = []
+        records = 0
+        valid_bytes = 0
+        with open(self.log_path(session_id), "rb") as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break  # Torn write from a crash: keep everything before it
+                op = record.get("op")
+                if op == "append":
+                    messages.append(record["msg"])
+                elif op == "insert":
+                    messages.insert(record["index"], record["msg"])
+                elif op == "pop":
+                    if messages:
+                        messages.pop(record.get("index", -1))
+                elif op == "clear":
+                    messages.clear()
+                records += 1
+                valid_bytes += len(raw)
+        return messages, records, valid_bytes
+
+    def load_session(self, session_id):
+        """
+        Replay a session's log and return (messages, ConversationLog) so new
+        changes are appended to the same log. Raises KeyError if it doesn't exist.
+        """
+        path = self.log_path(session_id)
+        # Open the log first, so background compaction leaves the file alone from here on
+        log = ConversationLog(self, session_id, titled=True)
+        if not os.path.exists(path):
+            log.close()
+            raise KeyError(session_id)
+        messages, records, valid_bytes = self._replay(session_id)
+        if valid_bytes < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+        log.records = records
+        self.update_index(session_id, messages=len(messages))
+        return messages, log
+
+    def compact(self, session_id):
+        """Rewrite a session's log as plain appends of its current messages."""
+        messages, records, _ = self._replay(session_id)
+        if records == len(messages):
+            return False
+        path = self.log_path(session_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps({"op": "append", "msg": message}, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, path)
+        self.update_index(session_id, messages=len(messages))
+        return True
+
+    def compact_old_sessions(self, idle_seconds=3600, max_age_days=None):
+        """
+        Compact logs idle for at least `idle_seconds` and delete sessions not
+        updated within `max_age_days` (if set). Sessions with a log open in
+        this process (the current one, or one resumed meanwhile) are skipped.
+        Returns (compacted, deleted) counts.
+        """
+        now = time.time()
+        compacted = deleted = 0
+        for entry in self.list_sessions():
+            session_id = entry["id"]
+            with self._maintenance_lock:
+                if session_id in self._open_logs:
+                    continue
+                path = self.log_path(session_id)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    self.delete_session(session_id)  # Index entry without a log
+                    continue
+                if max_age_days is not None and now - mtime > max_age_days * 86400:
+                    self.delete_session(session_id)
+                    deleted += 1
+                elif now - mtime > idle_seconds and self.compact(session_id):
+                    compacted += 1
+        return compacted, deleted
+
+    def delete_session(self, session_id):
+        """Remove a session's log and index entry."""
+        try:
+            os.remove(self.log_path(session_id))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            index = self._load_index()
+            if index.pop(session_id, None) is not None:
+                self._save_index(index)
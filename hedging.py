@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class RequestCancelled(Exception):
+    """Raised inside a hedged attempt that lost the race to another model."""
+
+
+class LatencyTracker:
+    """
+    Recent time-to-first-byte samples per model, persisted as JSON so hedge
+    delays are tuned from earlier sessions too. A model needs `min_samples`
+    measurements before its percentiles are trusted.
+    """
+
+    def __init__(self, path=None, max_samples=100, min_samples=5):
+        self.path = path
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self._samples = {}  # model -> deque of seconds
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for model, samples in (data.get("ttfb") or {}).items():
+            self._samples[model] = deque(
+                (float(s) for s in samples if isinstance(s, (int, float))), maxlen=self.max_samples)
+
+    def record(self, model, seconds):
+        """Add a time-to-first-byte measurement for a model."""
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.max_samples)
+            samples.append(round(seconds, 3))
+            self._dirty = True
+
+    def percentile(self, model, p):
+        """Return the p-th percentile (0-100) of the model's samples, or None if too few."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))]
+
+    def hedge_delay(self, model, p, default, minimum=0.5):
+        """Seconds to wait for a first byte from `model` before hedging to another one."""
+        value = self.percentile(model, p)
+        return max(minimum, default if value is None else value)
+
+    def save(self):
+        """Write the samples to disk if anything changed (atomic replace)."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"ttfb": {m: list(s) for m, s in self._samples.items()}}
+            self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                self._dirty = True
+
+
+class Attempt:
+    """One request in a hedged group, run on its own thread."""
+
+    def __init__(self, model):
+        self.model = model
+        self.started = time.monotonic()
+        self.ttfb = None
+        self.response = None
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+    def cancel(self):
+        """Abandon the attempt, closing its connection if the response has arrived."""
+        self.cancelled = True
+        response = self.response
+        if response is not None:
+            response.close()
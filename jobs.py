@@ -0,0 +1,177 @@
+import atexit
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+MAX_LINE_CHARS = 2000
+
+
+class JobLimitError(Exception):
+    """Raised when starting a job would exceed the concurrency limit."""
+
+
+class Job:
+    """One background script run. Output (stdout and stderr interleaved) is kept as a bounded tail."""
+
+    def __init__(self, job_id, filename, process, tail_lines, log_path=None):
+        self.id = job_id
+        self.filename = filename
+        self.process = process
+        self.started = time.time()
+        self.ended = None
+        self.returncode = None
+        self.cancelled = False
+        self.log_path = log_path
+        self.lines = 0
+        self.chars = 0
+        self._tail = deque(maxlen=tail_lines)
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True, name=f"job-{job_id}")
+        self._reader.start()
+
+    def _read(self):
+        log = None
+        if self.log_path:
+            try:
+                log = open(self.log_path, "w", encoding="utf-8")
+            except OSError:
+                log = None
+        try:
+            for line in self.process.stdout:
+                if log:
+                    log.write(line)
+                    log.flush()
+                line = line.rstrip("\r\n")
+                with self._lock:
+                    self.lines += 1
+                    self.chars += len(line) + 1
+                    self._tail.append(line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " …")
+        finally:
+            if log:
+                log.close()
+            self.process.stdout.close()
+            self.returncode = self.process.wait()
+            self.ended = time.time()
+
+    @property
+    def running(self):
+        return self.ended is None
+
+    @property
+    def status(self):
+        if self.running:
+            return "running"
+        if self.cancelled:
+            return "cancelled"
+        return "succeeded" if self.returncode == 0 else "failed"
+
+    @property
+    def runtime(self):
+        return (self.ended or time.time()) - self.started
+
+    def tail(self, lines=50):
+        """Return the last `lines` lines of output."""
+        with self._lock:
+            return list(self._tail)[-lines:] if lines > 0 else []
+
+
+class JobManager:
+    """
+    Runs Python scripts as background processes so a long test suite or data
+    job doesn't hold up the agent. Jobs are numbered, stay listed across turns
+    (the most recent `keep` finished ones), and at most `max_jobs` run at once.
+    Running jobs are stopped when the process exits.
+    """
+
+    def __init__(self, max_jobs=2, tail_lines=2000, keep=50, log_dir=None):
+        self.max_jobs = max_jobs
+        self.tail_lines = tail_lines
+        self.keep = keep
+        self.log_dir = log_dir  # Full output of each job is written here when set
+        self._jobs = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def start(self, filename):
+        """Start a script and return its Job. Raises JobLimitError, or OSError if it can't be started."""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.running)
+            if running >= self.max_jobs:
+                raise JobLimitError(f"{running} background job(s) already running (limit {self.max_jobs})")
+            self._counter += 1
+            job_id = self._counter
+            log_path = None
+            if self.log_dir:
+                try:
+                    os.makedirs(self.log_dir, exist_ok=True)
+                    log_path = os.path.join(self.log_dir, f"job-{os.getpid()}-{job_id}.log")
+                except OSError:
+                    log_path = None
+            # Own process group, so cancelling also stops anything the script started
+            group = {"start_new_session": True} if os.name == "posix" else \
+                {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+            process = subprocess.Popen(
+                [sys.executable, "-u", filename],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                **group,
+            )
+            job = Job(job_id, filename, process, self.tail_lines, log_path)
+            self._jobs[job_id] = job
+            finished = [j for j in self._jobs.values() if not j.running]
+            for old in finished[:max(0, len(finished) - self.keep)]:
+                del self._jobs[old.id]
+        return job
+
+    def get(self, job_id):
+        """Return a job by id, or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        """Return every listed job, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id, grace=3.0):
+        """Stop a running job (terminate, then kill after `grace` seconds). Returns the Job, or None if unknown."""
+        job = self.get(job_id)
+        if job is None or not job.running:
+            return job
+        job.cancelled = True
+        process = job.process
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+            try:
+                process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                if os.name == "posix":
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                process.wait()
+        except (ProcessLookupError, PermissionError):
+            pass  # Already gone
+        job._reader.join(timeout=grace)
+        return job
+
+    def shutdown(self):
+        """Stop every running job."""
+        for job in self.list():
+            if job.running:
+                self.cancel(job.id, grace=1.0)
+
+
+job_manager = JobManager()
+atexit.register(job_manager.shutdown)
@@ -1,8 +1,19 @@
+import os
+import threading
 from rich.console import Console
 from config import Config
 from chat_client import ChatClient
+from branches import BranchManager
+from conversation_store import ConversationStore
 from ui import (print_help, select_model, display_welcome_message, 
-                handle_agent_toggle, handle_parallel_toggle, handle_max_tools_command)
+                handle_agent_toggle, handle_parallel_toggle, handle_max_tools_command,
+                handle_follow_through_command, handle_show_command, handle_compare_command,
+                handle_jobs_command,
+                handle_router_command,
+                handle_profile_command, handle_fork_command, handle_switch_command,
+                handle_branches_command,
+                handle_sessions_command,
+                handle_resume_command)
 
 console = Console()
 
@@ -27,11 +38,24 @@ def main():
         console.print("[bold red]Failed to connect to OpenRouter API. Please check your API key and internet connection.[/bold red]")
         return
 
+    if cfg.persist_history:
+        store = ConversationStore(os.path.join(cfg.data_dir, "sessions"))
+        client.enable_persistence(store)
+        # Compact idle session logs without delaying startup
+        threading.Thread(
+            target=store.compact_old_sessions,
+            kwargs={"max_age_days": cfg.session_max_age_days},
+            daemon=True,
+        ).start()
+
     display_welcome_message(client)
 
+    branches = BranchManager(client)
+    profile_next = False
     try:
         while True:
-            user_input = console.input("[bold green]You:[/bold green] ")
+            prompt = "You:" if len(branches.list()) == 1 else f"You ({branches.current}):"
+            user_input = console.input(f"[bold green]{prompt}[/bold green] ")
 
             if user_input.startswith('/'):
                 command = user_input.lower().strip()
@@ -53,15 +77,49 @@ def main():
                     handle_parallel_toggle(client)
                 elif command.startswith("/max-tools"):
                     handle_max_tools_command(client, command)
+                elif command.startswith("/compare"):
+                    handle_compare_command(client, user_input.strip())
+                elif command.startswith("/router"):
+                    handle_router_command(client, command)
+                elif command.startswith("/jobs"):
+                    handle_jobs_command(command)
+                elif command.startswith("/show"):
+                    handle_show_command(client, command)
+                elif command.startswith("/fork"):
+                    handle_fork_command(branches, user_input.strip())
+                    client = branches.client
+                elif command.startswith("/switch"):
+                    handle_switch_command(branches, user_input.strip())
+                    client = branches.client
+                elif command.startswith("/branches"):
+                    handle_branches_command(branches, user_input.strip())
+                elif command.startswith("/profile"):
+                    message = user_input.strip()[len("/profile"):].strip()
+                    if message:
+                        handle_profile_command(client, message)
+                    else:
+                        profile_next = True
+                        console.print("[cyan]⏱️  Your next message will be profiled.[/cyan]")
+                elif command.startswith("/follow-through"):
+                    handle_follow_through_command(client, command)
                 elif command == "/stats":
                     client.show_stats()
+                elif command == "/sessions":
+                    handle_sessions_command(client)
+                elif command.startswith("/resume"):
+                    handle_resume_command(client, command)
                 else:
                     console.print(f"[yellow]Unknown command: {command}. Type /help for options.[/yellow]")
+            elif profile_next:
+                profile_next = False
+                handle_profile_command(client, user_input)
             else:
                 client.send_chat_request(user_input)
 
     except (KeyboardInterrupt, EOFError):
         console.print("\n[bold yellow]Exiting application. Goodbye![/bold yellow]")
+    finally:
+        branches.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
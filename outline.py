@@ -0,0 +1,174 @@
+import ast
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SKIP_DIRS = {".git", "__pycache__", "node_modules", "venv", ".venv", "env", "build", "dist", ".tox", ".mypy_cache"}
+MAX_DIRECTORY_FILES = 200
+# Parsing is only farmed out to worker processes when there are enough files to pay for starting them
+PROCESS_POOL_MIN_FILES = 64
+
+
+def _first_line(node):
+    docstring = ast.get_docstring(node, clean=True)
+    return docstring.strip().splitlines()[0] if docstring and docstring.strip() else ""
+
+
+def _signature(node):
+    signature = f"({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def _outline_body(body, depth, out):
+    indent = "  " * depth
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            decorators = " ".join(f"@{ast.unparse(d)}" for d in node.decorator_list)
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            if isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(b) for b in node.bases + node.keywords)
+                line = f"{indent}class {node.name}{f'({bases})' if bases else ''}"
+            else:
+                keyword = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                line = f"{indent}{keyword} {node.name}{_signature(node)}"
+            if decorators:
+                line = f"{indent}{decorators} {line.lstrip()}"
+            line += f"  L{start}-{node.end_lineno}"
+            doc = _first_line(node)
+            if doc:
+                line += f"  — {doc}"
+            out.append(line)
+            if isinstance(node, ast.ClassDef):
+                _outline_body(node.body, depth + 1, out)
+        elif depth == 0 and isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [t.id for t in targets if isinstance(t, ast.Name) and t.id.isupper()]
+            if names:
+                out.append(f"{', '.join(names)}  L{node.lineno}-{node.end_lineno}")
+
+
+def outline_source(source, name="<source>"):
+    """Return the outline text of Python source: classes, functions, signatures, docstrings and line ranges."""
+    try:
+        tree = ast.parse(source, filename=name)
+    except SyntaxError as e:
+        return f"🗂️ {name}: ⚠️ could not parse (SyntaxError at line {e.lineno}: {e.msg})"
+    lines = source.count("\n") + (0 if source.endswith("\n") or not source else 1)
+    header = f"🗂️ {name} ({lines} lines)"
+    doc = _first_line(tree)
+    if doc:
+        header += f"  — {doc}"
+    out = [header]
+    _outline_body(tree.body, 1, out)
+    if len(out) == 1:
+        out.append("  (no classes, functions or constants)")
+    return "\n".join(out)
+
+
+def _outline_worker(path):
+    """Outline one file; runs in a worker process. Returns (path, mtime_ns, size, text)."""
+    try:
+        st = os.stat(path)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            source = f.read()
+    except OSError as e:
+        return path, None, None, f"🗂️ {os.path.relpath(path)}: ⚠️ could not read ({e})"
+    return path, st.st_mtime_ns, st.st_size, outline_source(source, os.path.relpath(path))
+
+
+class OutlineCache:
+    """Outlines keyed by absolute path and validated by mtime and size; least recently used entries are evicted."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """Return the cached outline if the file is unchanged, else None."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        return None
+
+    def put(self, path, mtime_ns, size, text):
+        if mtime_ns is None:
+            return  # Unreadable file: nothing to cache
+        with self._lock:
+            self._entries[path] = (mtime_ns, size, text)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+outline_cache = OutlineCache()
+
+
+def outline_file(path):
+    """Return the outline of one Python file, from cache when the file is unchanged."""
+    path = os.path.abspath(path)
+    text = outline_cache.get(path)
+    if text is None:
+        _, mtime_ns, size, text = _outline_worker(path)
+        outline_cache.put(path, mtime_ns, size, text)
+    return text
+
+
+def find_python_files(directory):
+    """Return the .py files under a directory, skipping hidden, virtualenv and build directories."""
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(".py"))
+    return files
+
+
+def outline_directory(directory, max_files=MAX_DIRECTORY_FILES):
+    """
+    Outline every Python file under a directory. Files whose outline is not
+    cached are parsed on a process pool when there are many of them.
+    Returns (outlines in path order, number of files skipped over the limit).
+    """
+    files = [os.path.abspath(p) for p in find_python_files(directory)]
+    skipped = max(0, len(files) - max_files)
+    files = files[:max_files]
+    outlines = {}
+    todo = []
+    for path in files:
+        text = outline_cache.get(path)
+        if text is None:
+            todo.append(path)
+        else:
+            outlines[path] = text
+
+    results = None
+    workers = min(len(todo), os.cpu_count() or 1)
+    if len(todo) >= PROCESS_POOL_MIN_FILES and workers > 1:
+        try:
+            # Not fork: the caller has threads running (HTTP pool, tool output writer, prefetcher)
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as pool:
+                results = list(pool.map(_outline_worker, todo, chunksize=max(1, len(todo) // (workers * 4))))
+        except (BrokenProcessPool, OSError):
+            results = None  # No worker processes available here; parse in this process instead
+    if results is None:
+        results = [_outline_worker(path) for path in todo]
+    for path, mtime_ns, size, text in results:
+        outline_cache.put(path, mtime_ns, size, text)
+        outlines[path] = text
+    return [outlines[path] for path in files], skipped
@@ -0,0 +1,363 @@
+import os
+import re
+import shutil
+import tempfile
+
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Progressively looser ways of comparing a hunk line with a file line
+NORMALIZERS = (
+    ("exact", lambda s: s),
+    ("ignoring trailing whitespace", str.rstrip),
+    ("ignoring indentation", str.strip),
+)
+
+
+class PatchError(Exception):
+    """Raised when a patch cannot be parsed or applied; no files are changed."""
+
+
+class Hunk:
+    """One @@ section of a file patch: (tag, text) lines where tag is ' ', '-' or '+'."""
+
+    def __init__(self, old_start=None, old_count=None, new_count=None):
+        self.old_start = old_start  # 1-based, None for bare "@@" headers
+        self.old_count = old_count
+        self.new_count = new_count
+        self.lines = []
+        self.no_newline_at_end = False  # New side ends without a newline
+
+    def is_complete(self):
+        """True once the line counts from the @@ header are satisfied."""
+        if self.old_count is None:
+            return False
+        old = sum(1 for tag, _ in self.lines if tag != "+")
+        new = sum(1 for tag, _ in self.lines if tag != "-")
+        return old >= self.old_count and new >= self.new_count
+
+
+class FilePatch:
+    """The hunks for one file. old_path is None for new files, new_path None for deletions."""
+
+    def __init__(self, old_path, new_path):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks = []
+
+    @property
+    def path(self):
+        return self.new_path or self.old_path
+
+    @property
+    def is_new(self):
+        return self.old_path is None
+
+    @property
+    def is_delete(self):
+        return self.new_path is None
+
+
+def _header_path(value):
+    path = value.split("\t")[0].strip().strip('"')
+    return None if path == "/dev/null" else path
+
+
+def _split_lines(text):
+    """Split on \\n, \\r\\n and \\r only; str.splitlines also breaks on form feeds, \\x85, \\u2028 and others."""
+    lines = re.split(r"\r\n|\r|\n", text)
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def parse_patch(text):
+    """Parse a (possibly multi-file) unified diff into FilePatch objects."""
+    lines = _split_lines(text)
+    patches = []
+    current = None
+    i = 0
+
+    def is_file_header(index):
+        return lines[index].startswith("--- ") and index + 1 < len(lines) and lines[index + 1].startswith("+++ ")
+
+    while i < len(lines):
+        line = lines[i]
+        if is_file_header(i):
+            current = FilePatch(_header_path(line[4:]), _header_path(lines[i + 1][4:]))
+            if current.path is None:
+                raise PatchError("file header with /dev/null on both sides")
+            patches.append(current)
+            i += 2
+            continue
+        if not line.startswith("@@"):
+            i += 1  # "diff --git", "index ..." and other noise
+            continue
+        if current is None:
+            raise PatchError("hunk found before any '---'/'+++' file header")
+        match = HUNK_RE.match(line)
+        if match:
+            hunk = Hunk(int(match.group(1)), int(match.group(2) or 1), int(match.group(4) or 1))
+        else:
+            hunk = Hunk()
+        i += 1
+        while i < len(lines) and not hunk.is_complete():
+            body = lines[i]
+            if body.startswith("@@") or body.startswith("diff ") or is_file_header(i):
+                break
+            if body.startswith("\\"):
+                # "\ No newline at end of file" applies to the line before it
+                if hunk.lines and hunk.lines[-1][0] != "-":
+                    hunk.no_newline_at_end = True
+            elif body[:1] in (" ", "-", "+"):
+                hunk.lines.append((body[0], body[1:]))
+            elif body == "":
+                hunk.lines.append((" ", ""))  # Context line whose leading space was stripped
+            elif hunk.old_count is not None:
+                raise PatchError(f"unexpected line in hunk for {current.path}: {body!r}")
+            else:
+                break
+            i += 1
+        if i < len(lines) and lines[i].startswith("\\"):
+            hunk.no_newline_at_end = hunk.lines[-1][0] != "-" if hunk.lines else False
+            i += 1
+        if not hunk.lines:
+            raise PatchError(f"empty hunk for {current.path}")
+        current.hunks.append(hunk)
+
+    if not patches:
+        raise PatchError("no file headers ('--- a/file', '+++ b/file') found")
+    # Strip git's a/ and b/ prefixes when both sides use them
+    if all((p.old_path is None or p.old_path.startswith("a/")) and
+           (p.new_path is None or p.new_path.startswith("b/")) for p in patches):
+        for p in patches:
+            p.old_path = p.old_path[2:] if p.old_path else None
+            p.new_path = p.new_path[2:] if p.new_path else None
+    return patches
+
+
+def _find_block(lines, block, hint, start, normalize, cache):
+    """Return the index nearest to `hint` (and >= start) where `block` matches, or None."""
+    if normalize not in cache:
+        cache[normalize] = [normalize(line) for line in lines]
+    normalized = cache[normalize]
+    wanted = [normalize(line) for line in block]
+    last = len(lines) - len(wanted)
+    hint = min(max(hint, start), max(last, start))
+    for distance in range(max(hint - start, last - hint) + 1):
+        for pos in (hint + distance, hint - distance) if distance else (hint,):
+            if start <= pos <= last and normalized[pos] == wanted[0] \
+                    and normalized[pos:pos + len(wanted)] == wanted:
+                return pos
+    return None
+
+
+def apply_hunks(lines, hunks, path, fuzz=2):
+    """
+    Apply hunks to a list of lines (without line endings) and return
+    (new_lines, notes). Each hunk is located near its stated line number,
+    tolerating shifted positions, whitespace differences and up to `fuzz`
+    mismatched context lines at either end. Raises PatchError if a hunk
+    cannot be placed.
+    """
+    result = list(lines)
+    notes = []
+    start = 0
+    delta = 0
+    for number, hunk in enumerate(hunks, 1):
+        lead = next((n for n, (tag, _) in enumerate(hunk.lines) if tag != " "), len(hunk.lines))
+        trail = next((n for n, (tag, _) in enumerate(reversed(hunk.lines)) if tag != " "), len(hunk.lines))
+        hint = (hunk.old_start - 1 if hunk.old_start else start) + delta
+        placed = None
+        cache = {}
+        if all(tag == "+" for tag, _ in hunk.lines):
+            # Pure insertion without context: "@@ -N,0" means after line N, so trust the line number
+            at = hunk.old_start + delta if hunk.old_start is not None else start
+            placed = (min(max(at, start), len(result)), [], [text for _, text in hunk.lines], "exact", 0)
+        for trim in range(fuzz + 1 if placed is None else 0):
+            front, back = min(trim, lead), min(trim, trail)
+            if trim and front == 0 and back == 0:
+                break
+            body = hunk.lines[front:len(hunk.lines) - back]
+            old = [text for tag, text in body if tag != "+"]
+            new = [text for tag, text in body if tag != "-"]
+            if not old:
+                break  # Fuzz never trims away all of a hunk's context
+            for label, normalize in NORMALIZERS:
+                pos = _find_block(result, old, hint + front, start, normalize, cache)
+                if pos is not None:
+                    placed = (pos, old, new, label, trim)
+                    break
+            if placed:
+                break
+        if placed is None:
+            expected = next((text for tag, text in hunk.lines if tag != "+"), "")
+            raise PatchError(f"hunk {number} of {path} does not match the file (expected {expected.strip()!r}"
+                             f"{f' near line {hunk.old_start}' if hunk.old_start else ''})")
+        pos, old, new, label, trim = placed
+        if hunk.old_start and pos != hunk.old_start - 1 + delta + min(trim, lead):
+            notes.append(f"hunk {number} applied at line {pos + 1}")
+        if label != "exact":
+            notes.append(f"hunk {number} matched {label}")
+        if trim:
+            notes.append(f"hunk {number} matched with fuzz {trim}")
+        result[pos:pos + len(old)] = new
+        start = pos + len(new)
+        delta += len(new) - len(old)
+    return result, notes
+
+
+def _read_lines(path):
+    """Return (lines, newline, ends_with_newline) for a text file, keeping its line ending style."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        content = f.read()
+    newline = "\r\n" if "\r\n" in content else "\n"
+    return _split_lines(content), newline, content.endswith(("\n", "\r"))
+
+
+def _write_temp(path, content, mode_source=None):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".patch-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode_source and os.path.exists(mode_source):
+            shutil.copymode(mode_source, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def apply_patch(file_patches, fuzz=2):
+    """
+    Apply parsed file patches as one transaction. Every hunk of every file
+    is matched and the new contents are written to temporary files first;
+    only when all of them succeed are the files swapped into place. If
+    anything fails, every file is left (or put back) as it was. Several
+    sections for the same file are applied one after another.
+    Returns a list of {"path", "action", "added", "removed", "notes"} dicts.
+    """
+    files = {}  # path -> (lines, newline, trailing newline, mode source) as patched so far; None once removed
+    results = {}  # path -> result
+
+    def exists(path):
+        return files[path] is not None if path in files else os.path.exists(path)
+
+    def current(path):
+        if path in files:
+            if files[path] is None:
+                raise PatchError(f"{path} is patched after being deleted or renamed earlier in the same patch")
+            return files[path]
+        if not os.path.isfile(path):
+            raise PatchError(f"{path} does not exist")
+        try:
+            lines, newline, trailing = _read_lines(path)
+        except UnicodeDecodeError:
+            raise PatchError(f"{path} is not a UTF-8 text file")
+        return lines, newline, trailing, path
+
+    # Match every hunk in memory first
+    for fp in file_patches:
+        if fp.is_new:
+            if exists(fp.path):
+                raise PatchError(f"{fp.path} already exists")
+            lines, newline, trailing, mode_source = [], "\n", True, None
+        else:
+            lines, newline, trailing, mode_source = current(fp.old_path)
+        new_lines, notes = apply_hunks(lines, fp.hunks, fp.path, fuzz)
+        if fp.hunks and fp.hunks[-1].no_newline_at_end:
+            trailing = False
+        elif fp.is_new:
+            trailing = True
+        previous = results.pop(fp.old_path or fp.new_path, None)
+        result = {"path": fp.path, "notes": (previous["notes"] if previous else []) + notes,
+                  "added": sum(1 for h in fp.hunks for tag, _ in h.lines if tag == "+"),
+                  "removed": sum(1 for h in fp.hunks for tag, _ in h.lines if tag == "-")}
+        if previous:
+            result["added"] += previous["added"]
+            result["removed"] += previous["removed"]
+        if fp.is_delete:
+            if any(line.strip() for line in new_lines):
+                raise PatchError(f"patch deletes {fp.old_path} but leaves content behind")
+            files[fp.old_path] = None
+            if not previous or previous["action"] != "A":
+                results[fp.old_path] = dict(result, action="D")
+            continue
+        if fp.is_new:
+            action = "M" if previous else "A"  # Deleted and re-created
+        elif fp.old_path != fp.new_path:
+            if exists(fp.new_path):
+                raise PatchError(f"cannot rename {fp.old_path} to {fp.new_path}: {fp.new_path} already exists")
+            files[fp.old_path] = None
+            action = "A" if previous and previous["action"] == "A" else "R"
+        else:
+            action = previous["action"] if previous else "M"
+        files[fp.new_path] = (new_lines, newline, trailing, mode_source)
+        results[fp.new_path] = dict(result, action=action)
+
+    # Stage: write every new file next to its target
+    staged = []  # (path, temp path or None for deletion)
+    temp_paths = []
+    created_dirs = []
+    try:
+        for path, state in files.items():
+            if state is None:
+                if os.path.exists(path):
+                    staged.append((path, None))
+                continue
+            new_lines, newline, trailing, mode_source = state
+            content = newline.join(new_lines) + (newline if trailing and new_lines else "")
+            parent = os.path.dirname(os.path.abspath(path))
+            if not os.path.isdir(parent):
+                missing = parent
+                while not os.path.isdir(os.path.dirname(missing)):
+                    missing = os.path.dirname(missing)
+                os.makedirs(parent)
+                created_dirs.append(missing)
+            temp_paths.append(_write_temp(path, content, mode_source))
+            staged.append((path, temp_paths[-1]))
+    except OSError as e:
+        for tmp_path in temp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        for directory in reversed(created_dirs):
+            shutil.rmtree(directory, ignore_errors=True)
+        raise PatchError(f"could not stage changes: {e}")
+
+    # Commit: keep the originals in memory so a failure part-way can be undone
+    originals = {}
+    for path, _ in staged:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                originals[path] = f.read()
+        else:
+            originals[path] = None
+    try:
+        # Writes before deletions, so a renamed file is never missing from both places
+        for path, tmp_path in sorted(staged, key=lambda item: item[1] is None):
+            if tmp_path is None:
+                os.remove(path)
+            else:
+                os.replace(tmp_path, path)
+    except OSError as e:
+        for path, data in originals.items():
+            try:
+                if data is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    with open(path, "wb") as f:
+                        f.write(data)
+            except OSError:
+                pass
+        for _, tmp_path in staged:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        for directory in reversed(created_dirs):
+            shutil.rmtree(directory, ignore_errors=True)
+        raise PatchError(f"could not write changes, all files restored: {e}")
+    return list(results.values())
@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Path-like tokens; candidates must contain a separator or an extension and exist on disk
+TOKEN_RE = re.compile(r"[\w.~/\\-]+")
+# Files in list_files output ("📄 name"), relative to the listed directory
+LISTING_RE = re.compile(r"^📄 (.+)$", re.MULTILINE)
+
+
+def extract_paths(messages, max_candidates=200):
+    """
+    Return likely file paths mentioned in recent messages: path-like tokens in
+    user prompts and tool results, string arguments of tool calls, and files
+    listed by list_files (joined with the directory that was listed).
+    """
+    candidates = []
+    arguments = {}
+    for message in messages:
+        for call in message.get("tool_calls") or ():
+            try:
+                args = json.loads(call["function"].get("arguments") or "{}")
+            except (KeyError, TypeError, ValueError):
+                continue
+            if isinstance(args, dict):
+                arguments[call.get("id")] = args
+                candidates.extend(v for v in args.values() if isinstance(v, str) and len(v) < 512)
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, str) or message.get("role") not in ("user", "tool"):
+            continue
+        if message.get("name") == "list_files":
+            directory = arguments.get(message.get("tool_call_id"), {}).get("directory") or "."
+            candidates.extend(os.path.join(directory, name.strip()) for name in LISTING_RE.findall(content))
+        else:
+            candidates.extend(TOKEN_RE.findall(content))
+
+    paths = []
+    seen = set()
+    for token in candidates:
+        token = token.strip().rstrip(".")
+        if not token or ("/" not in token and "\\" not in token and "." not in token[1:]):
+            continue
+        path = os.path.abspath(os.path.expanduser(token))
+        if path not in seen:
+            seen.add(path)
+            paths.append(path)
+            if len(paths) >= max_candidates:
+                break
+    return paths
+
+
+class Prefetcher:
+    """
+    Warms the shared file cache in the background while a chat request is in
+    flight, so a read_file for a path the user or a tool just mentioned is
+    served from memory. Entries are still validated against mtime and size
+    when they are read, so a prefetched copy is never stale.
+    """
+
+    def __init__(self, file_cache, max_files=16, max_file_bytes=1024 * 1024, workers=2):
+        self.file_cache = file_cache
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.prefetched = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def prefetch(self, messages):
+        """Schedule prefetching for paths found in `messages` and return immediately."""
+        snapshot = list(messages)
+        try:
+            self._executor.submit(self._run, snapshot)
+        except RuntimeError:
+            pass  # Shut down
+
+    def _run(self, messages):
+        loaded = 0
+        for path in extract_paths(messages):
+            if loaded >= self.max_files:
+                break
+            if self.file_cache.warm(path, self.max_file_bytes):
+                loaded += 1
+        with self._lock:
+            self.prefetched += loaded
+
+    def close(self):
+        """Stop the background workers, dropping queued work."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,172 @@
+import cProfile
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+STDLIB_DIR = os.path.abspath(sysconfig.get_paths()["stdlib"])
+
+
+def module_of(filename, function=""):
+    """
+    Map a profiled code location to a readable bucket: this project's modules
+    by name (chat_client, tools, ...), third-party packages by package (rich,
+    requests, ...), the standard library as "stdlib:<module>", and C
+    functions by what they are doing (network, waiting, ...).
+    """
+    if filename == "~":
+        if "_socket" in function or "ssl" in function.lower() or "select" in function:
+            return "network (socket/ssl)"
+        if "acquire" in function or "wait" in function or "_queue" in function:
+            return "waiting (locks/threads)"
+        if "sleep" in function:
+            return "sleep"
+        return "builtins"
+    if filename.startswith("<"):
+        return "<frozen>" if filename.startswith("<frozen") else filename
+    path = os.path.abspath(filename)
+    if os.path.dirname(path) == PROJECT_DIR:
+        return os.path.splitext(os.path.basename(path))[0]
+    parts = path.split(os.sep)
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return os.path.splitext(parts[index + 1])[0]
+    if path.startswith(STDLIB_DIR + os.sep):
+        return "stdlib:" + os.path.splitext(os.path.relpath(path, STDLIB_DIR).split(os.sep)[0])[0]
+    return os.path.basename(path)
+
+
+class TurnProfiler:
+    """
+    Runs one call under cProfile and tracemalloc. The calling thread is
+    always profiled; threads started during the call (parallel tools, hedged
+    requests, /compare) are too where the interpreter allows more than one
+    active profiler. Such a thread stops profiling itself once the call is
+    over, so long-lived ones (pool workers, the tool output writer) are only
+    measured during the turn. Raw results are written to `output_dir`.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._thread_profiles = []
+        self._active = False
+        self._lock = threading.Lock()
+
+    def _thread_hook(self, frame, event, arg):
+        sys.setprofile(None)
+        if not self._active:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # Python 3.12+: only one cProfile can be active at a time
+        with self._lock:
+            self._thread_profiles.append(profile)
+
+        # A profiler can only be disabled from its own thread, so check on each call whether the turn is over
+        def stop_when_done(frame, event, arg):
+            if not self._active:
+                profile.disable()
+                sys.settrace(None)
+
+        sys.settrace(stop_when_done)
+
+    def run(self, func, *args, **kwargs):
+        """Call func(*args, **kwargs) under the profilers, print a report and return its result."""
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        main_profile = cProfile.Profile()
+        self._active = True
+        threading.setprofile(self._thread_hook)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        main_profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            main_profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._active = False
+            threading.setprofile(None)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not was_tracing:
+                tracemalloc.stop()
+            try:
+                self._report(main_profile, before, after, peak, wall, cpu)
+            except Exception as e:
+                console.print(f"[bold red]❌ Could not build the profile report: {e}[/bold red]")
+            with self._lock:
+                self._thread_profiles = []
+
+    def _report(self, main_profile, before, after, peak, wall, cpu):
+        stats = pstats.Stats(main_profile)
+        with self._lock:
+            thread_profiles = list(self._thread_profiles)
+        for profile in thread_profiles:
+            stats.add(profile)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, datetime.now().strftime("turn-%Y%m%d-%H%M%S-%f"))
+        stats.dump_stats(base + ".prof")
+        after.dump(base + ".tracemalloc")
+
+        by_module = defaultdict(float)
+        for (filename, _, function), (_, _, self_time, _, _) in stats.stats.items():
+            by_module[module_of(filename, function)] += self_time
+        profiled = sum(by_module.values()) or 1e-9
+
+        console.print(f"\n[bold cyan]⏱️  Profiled turn: {wall:.2f}s wall, {cpu:.2f}s CPU, "
+                      f"{peak / 1024 / 1024:.1f} MB peak traced memory, "
+                      f"{1 + len(thread_profiles)} thread(s) profiled[/bold cyan]")
+
+        table = Table(title="Time by Module (self time)")
+        table.add_column("Module", style="cyan")
+        table.add_column("Seconds", justify="right")
+        table.add_column("Share", justify="right", style="magenta")
+        for module, seconds in sorted(by_module.items(), key=lambda item: -item[1])[:12]:
+            table.add_row(module, f"{seconds:.3f}", f"{seconds / profiled:.0%}")
+        console.print(table)
+
+        table = Table(title="Hot Spots")
+        table.add_column("Function", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Self (s)", justify="right")
+        table.add_column("Cumulative (s)", justify="right")
+        hot = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:10]
+        for (filename, line, function), (_, calls, self_time, cumulative, _) in hot:
+            location = module_of(filename, function) + ("" if filename == "~" else f":{line}")
+            table.add_row(f"{location} {function}", str(calls), f"{self_time:.3f}", f"{cumulative:.3f}")
+        console.print(table)
+
+        memory = defaultdict(lambda: [0, 0])
+        for diff in after.compare_to(before, "filename"):
+            bucket = memory[module_of(diff.traceback[0].filename)]
+            bucket[0] += diff.size_diff
+            bucket[1] += diff.count_diff
+        table = Table(title="Memory Allocated During the Turn")
+        table.add_column("Module", style="cyan")
+        table.add_column("Net KB", justify="right")
+        table.add_column("Blocks", justify="right")
+        for module, (size, count) in sorted(memory.items(), key=lambda item: -abs(item[1][0]))[:10]:
+            table.add_row(module, f"{size / 1024:+.1f}", f"{count:+d}")
+        console.print(table)
+        console.print(f"[dim]Raw profiles saved to {base}.prof (pstats / snakeviz) "
+                      f"and {base}.tracemalloc (tracemalloc.Snapshot.load)[/dim]")
@@ -0,0 +1,56 @@
+import re
+
+ACTIONS = r"(?:check|list|read|write|create|delete|execute|run)"
+
+# All promise phrasings in one precompiled alternation, so a reply is scanned once
+PROMISE_RE = re.compile(
+    r"\blet me " + ACTIONS + r"\b"
+    r"|\bi(?:'ll|'m going to| will) (?:now\s+)?(?:proceed to\s+)?" + ACTIONS + r"\b"
+    r"|file list|directory|check the file|read the file|write to|create file|delete file|list files",
+    re.IGNORECASE,
+)
+
+# Longest phrase the pattern can match; text this long is carried over between chunks
+OVERLAP = 64
+
+
+class PromiseDetector:
+    """
+    Detects when the AI says it will use a tool ("let me check the files",
+    "I'll read that file"). Text is fed incrementally as it streams in and
+    each character is scanned once, with a small overlap so phrases split
+    across chunks are still found. Call close() when the reply is complete.
+    """
+
+    def __init__(self):
+        self.promises = []
+        self._tail = ""
+        self._settled = 0  # Matches in _tail ending at or before this index were already handled
+
+    def _add(self, match):
+        phrase = match.group(0).lower()
+        if phrase not in self.promises:
+            self.promises.append(phrase)
+
+    def feed(self, text):
+        """Scan a newly received chunk of the reply."""
+        if not text:
+            return
+        window = self._tail + text
+        settled = len(window)
+        for match in PROMISE_RE.finditer(window):
+            if match.end() == len(window):
+                # "\b" also matches at the end of what has arrived so far ("I will run" + "ning"),
+                # so wait for the next chunk before reporting it
+                settled = len(window) - 1
+            elif match.end() > self._settled:
+                self._add(match)
+        self._tail = window[-OVERLAP:]
+        self._settled = settled - (len(window) - len(self._tail))
+
+    def close(self):
+        """Finish the reply, reporting a phrase that ended its last chunk."""
+        for match in PROMISE_RE.finditer(self._tail):
+            if match.end() == len(self._tail) and match.end() > self._settled:
+                self._add(match)
+        self._settled = len(self._tail)
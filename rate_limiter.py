@@ -0,0 +1,223 @@
+import functools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value):
+    """Parse an X-RateLimit-Reset header (epoch ms, epoch s or delta s) into seconds from now."""
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset > 1e12:
+        reset = reset / 1000.0 - time.time()
+    elif reset > 1e9:
+        reset = reset - time.time()
+    return max(0.0, reset)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate=None, capacity=None):
+        self.rate = rate  # None means unlimited until the server tells us otherwise
+        self.capacity = capacity or (max(1.0, rate) if rate else 1.0)
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consume a token; call only after wait_time() returned 0."""
+        if self.rate:
+            self.tokens -= 1
+
+    def update(self, limit, remaining, reset_in, window):
+        """Adjust rate and level from X-RateLimit-* headers."""
+        now = time.monotonic()
+        self._refill(now)
+        was_unlimited = not self.rate
+        if limit:
+            self.capacity = float(limit)
+            self.rate = float(limit) / window
+        if remaining is not None:
+            # The server's count is authoritative; trust it outright when we had no limit before
+            self.tokens = float(remaining) if was_unlimited else min(self.tokens, float(remaining))
+            if remaining <= 0 and reset_in:
+                self.block(reset_in)
+
+    def block(self, seconds):
+        """Refuse tokens for the next `seconds` (e.g. after a 429 with Retry-After)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit: grows by ~1 per window of successes, halves on throttling."""
+
+    def __init__(self, maximum, minimum=1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a request slot is free under the current limit."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled):
+        """Free a slot; shrink the limit if the request was throttled, else grow it slowly."""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter for one API key: a token bucket for the key, one
+    per model (driven by X-RateLimit-* response headers), an adaptive
+    concurrency limit, and jittered exponential backoff on 429/5xx.
+    """
+
+    def __init__(self, requests_per_minute=None, max_concurrency=8, max_retries=5,
+                 base_delay=0.5, max_delay=30.0, window=60.0):
+        self.key_bucket = TokenBucket(requests_per_minute / 60.0 if requests_per_minute else None)
+        self.model_buckets = {}
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.throttled = 0  # 429 responses seen, shown by /stats
+        self._lock = threading.Lock()
+
+    def _model_bucket(self, model):
+        bucket = self.model_buckets.get(model)
+        if bucket is None:
+            bucket = self.model_buckets[model] = TokenBucket()
+        return bucket
+
+    def acquire(self, model):
+        """Block until both the key and the model bucket grant a token, then take a concurrency slot."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                model_bucket = self._model_bucket(model)
+                wait = max(self.key_bucket.wait_time(now), model_bucket.wait_time(now))
+                if wait == 0:
+                    self.key_bucket.take()
+                    model_bucket.take()
+                    break
+            time.sleep(min(wait, self.max_delay))
+        self.concurrency.acquire()
+
+    def release(self, model, response):
+        """Return the concurrency slot and learn from the response's status and headers."""
+        throttled = response is not None and response.status_code == 429
+        self.concurrency.release(throttled)
+        if response is None:
+            return
+        headers = response.headers
+        with self._lock:
+            bucket = self._model_bucket(model)
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            try:
+                bucket.update(
+                    int(limit) if limit else None,
+                    int(remaining) if remaining is not None else None,
+                    parse_reset(headers.get("X-RateLimit-Reset")),
+                    self.window,
+                )
+            except ValueError:
+                pass
+            if throttled:
+                self.throttled += 1
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                if retry_after:
+                    bucket.block(retry_after)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Delay before retry number `attempt` (0-based): Retry-After if given, else full-jitter exponential."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def post(self, http, url, model, on_retry=None, **kwargs):
+        """
+        POST through the limiter, retrying 429 and 5xx responses with backoff.
+        Returns (response, release) for the last response: call release() once
+        its body has been read or it was closed, since a streamed reply keeps
+        its concurrency slot until then. Raises requests exceptions from the transport.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(model)
+            try:
+                response = http.post(url, **kwargs)
+            except BaseException:
+                self.release(model, None)
+                raise
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                return response, functools.partial(self.release, model, response)
+            self.release(model, response)
+            delay = self.backoff_delay(attempt, parse_retry_after(response.headers.get("Retry-After")))
+            response.close()  # Return the connection to the pool (matters for streamed responses)
+            if on_retry:
+                on_retry(attempt + 1, delay, response.status_code)
+            time.sleep(delay)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter_for(config):
+    """Return the process-wide RateLimiter for the config's API key (created on first use)."""
+    with _limiters_lock:
+        limiter = _limiters.get(config.api_key)
+        if limiter is None:
+            limiter = _limiters[config.api_key] = RateLimiter(
+                requests_per_minute=config.requests_per_minute,
+                max_concurrency=config.max_concurrent_requests,
+                max_retries=config.max_retries,
+            )
+        return limiter
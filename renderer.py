@@ -0,0 +1,93 @@
+import re
+import time
+from rich.live import Live
+from rich.markdown import Markdown
+
+FENCE_RE = re.compile(r"^(`{3,}|~{3,})(.*)$")
+
+
+class IncrementalMarkdownRenderer:
+    """
+    Renders a streamed Markdown reply block by block.
+
+    Finished blocks (paragraphs and lists ended by a blank line, closed code
+    fences) are rendered once and committed to scrollback. Only the last,
+    still-open block is re-rendered as text arrives, at most `fps` times per
+    second, so the cost of each update does not grow with the reply length.
+    """
+
+    def __init__(self, console, fps=12, header="[bold blue]AI:[/bold blue]", before_output=None):
+        self.console = console
+        self.before_output = before_output  # Called once before the first output (e.g. to flush tool output)
+        self.min_interval = 1.0 / fps
+        self.header = header
+        self.has_output = False
+        self._buffer = ""  # Uncommitted text: the open block plus any partial line
+        self._scan_pos = 0  # Start of the first line in _buffer not yet classified
+        self._fence = None  # Opening fence marker while inside a code block
+        self._live = None
+        self._last_refresh = 0.0
+        self._dirty = False
+        self._committed = False
+
+    def feed(self, text):
+        """Add streamed text, committing any blocks it completes."""
+        if not text:
+            return
+        if not self.has_output:
+            self.has_output = True
+            if self.before_output:
+                self.before_output()
+            self.console.print(self.header)
+            if self.console.is_terminal and not self.console.quiet:
+                self._live = Live(console=self.console, auto_refresh=False, transient=True)
+                self._live.start()
+        self._buffer += text
+        self._committed = False
+        self._split_blocks()
+        self._dirty = True
+        # Redraw immediately when a block moved to scrollback so it isn't shown twice
+        self._refresh(force=self._committed)
+
+    def _split_blocks(self):
+        while True:
+            newline = self._buffer.find("\n", self._scan_pos)
+            if newline == -1:
+                return
+            line = self._buffer[self._scan_pos:newline].strip()
+            self._scan_pos = newline + 1
+            fence = FENCE_RE.match(line)
+            if self._fence is not None:
+                # Only a bare fence of the same kind and at least the same length closes the block
+                if fence and not fence.group(2).strip() and fence.group(1)[0] == self._fence[0] \
+                        and len(fence.group(1)) >= len(self._fence):
+                    self._fence = None
+                    self._commit()
+            elif fence:
+                self._fence = fence.group(1)
+            elif not line:
+                self._commit()
+
+    def _commit(self):
+        block, self._buffer = self._buffer[:self._scan_pos], self._buffer[self._scan_pos:]
+        self._scan_pos = 0
+        if block.strip():
+            self.console.print(Markdown(block))
+            self._committed = True
+
+    def _refresh(self, force=False):
+        if not self._live or not self._dirty:
+            return
+        now = time.monotonic()
+        if force or now - self._last_refresh >= self.min_interval:
+            self._live.update(Markdown(self._buffer), refresh=True)
+            self._last_refresh = now
+            self._dirty = False
+
+    def close(self):
+        """Commit whatever is left and stop live updates."""
+        if self._live:
+            self._live.stop()
+            self._live = None
+        self._scan_pos = len(self._buffer)
+        self._commit()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Local cache of chat completion responses keyed by a hash of the canonical
+    request body (model, messages, tools, ...). Stored in SQLite so it is
+    shared across runs and processes, with a TTL and least-recently-used
+    eviction once the stored bytes exceed `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl_seconds=7 * 86400):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def fingerprint(body):
+        """
+        Return a stable hash of a canonical request body (see
+        conversation.encode_payload) encoded without transport-only fields
+        such as "stream".
+        """
+        return hashlib.sha256(body).hexdigest()
+
+    def get(self, key):
+        """Return the cached response dict for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        """Store a response dict and evict least-recently-used entries beyond the size limit."""
+        body = json.dumps(response, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now),
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                for old_key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if excess <= 0:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    excess -= size
+            self._db.commit()
+
+    def stats(self):
+        """Return entry count, stored bytes and this process's hit/miss counts."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
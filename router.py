@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import Counter
+
+# A model needs this many priced requests before its measured cost per request is trusted
+MIN_COST_SAMPLES = 3
+# Seconds a fast-tier model is skipped after one of its requests fails
+FAILURE_COOLDOWN = 300
+
+
+class ModelRouter:
+    """
+    Chooses the model for each request of an agent turn. The user's prompts
+    go to the strong model (the one selected with /models); follow-up
+    requests made after tool results go to the fast tier. Which fast model is
+    used, and whether one is used at all, follows what the client measures:
+    time to first byte from the shared LatencyTracker and cost per request
+    from recorded usage (registry pricing until there are enough samples). A
+    fast-tier model that proves both slower and more expensive than the
+    strong model is skipped, and one whose request failed is rested for a while.
+    """
+
+    def __init__(self, latency, pricing, fast_models, enabled=True):
+        self.latency = latency  # LatencyTracker shared by every client
+        self.pricing = pricing  # model id -> (prompt, completion) USD per token
+        self.fast_models = list(fast_models)
+        self.enabled = enabled
+        self.routed = Counter()  # model -> requests sent to it by the router
+        self._costs = {}  # model -> [priced requests, total USD]
+        self._failed_at = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        """True when routing is on and a fast tier is configured."""
+        return self.enabled and bool(self.fast_models)
+
+    def record_cost(self, model, cost):
+        """Add the cost of one request made with a model."""
+        with self._lock:
+            entry = self._costs.setdefault(model, [0, 0.0])
+            entry[0] += 1
+            entry[1] += cost
+
+    def record_failure(self, model):
+        """Rest a model after a failed request."""
+        with self._lock:
+            self._failed_at[model] = time.monotonic()
+
+    def cost_per_request(self, model):
+        """Average measured USD per request, or None with too few samples."""
+        with self._lock:
+            requests, total = self._costs.get(model, (0, 0.0))
+        return total / requests if requests >= MIN_COST_SAMPLES else None
+
+    def _healthy(self, model):
+        with self._lock:
+            failed_at = self._failed_at.get(model)
+        return failed_at is None or time.monotonic() - failed_at > FAILURE_COOLDOWN
+
+    def _costlier(self, model, other):
+        """Whether `model` costs more than `other`: measured per request when both are known, else by list price."""
+        cost, other_cost = self.cost_per_request(model), self.cost_per_request(other)
+        if cost is None or other_cost is None:
+            cost, other_cost = sum(self.pricing(model)), sum(self.pricing(other))
+            if not cost or not other_cost:
+                return False  # Unpriced: no evidence either way
+        return cost > other_cost
+
+    def _outclassed(self, model, strong):
+        """True once measurements show a fast-tier model is slower to answer and costlier than the strong one."""
+        ttfb, strong_ttfb = self.latency.percentile(model, 50), self.latency.percentile(strong, 50)
+        slower = ttfb is not None and strong_ttfb is not None and ttfb > strong_ttfb
+        return slower and self._costlier(model, strong)
+
+    def choose(self, step, strong, tool_errors=False):
+        """
+        Return (model, reason) for a request. `step` is "prompt" for the
+        user's message and "follow_up" for requests after tool results;
+        follow-ups whose tool results contain errors stay on the strong model.
+        """
+        if not self.active or step == "prompt":
+            return strong, "prompt"
+        if tool_errors:
+            return strong, "tool error"
+        candidates = [m for m in self.fast_models
+                      if m != strong and self._healthy(m) and not self._outclassed(m, strong)]
+        if not candidates:
+            return strong, "no suitable fast model"
+
+        def rank(model):
+            # Unmeasured models first (in configured order) so they get measured, then fastest first byte, then cheapest
+            ttfb = self.latency.percentile(model, 50)
+            if ttfb is None:
+                return (0, self.fast_models.index(model))
+            cost = self.cost_per_request(model)
+            return (1, ttfb, cost if cost is not None else sum(self.pricing(model)))
+
+        return min(candidates, key=rank), "follow-up"
+
+    def stats(self, strong):
+        """Return [(model, tier, p50 first byte, cost per request, routed requests, resting)] for the strong and fast models."""
+        rows = []
+        for model, tier in [(strong, "strong")] + [(m, "fast") for m in self.fast_models if m != strong]:
+            rows.append((model, tier, self.latency.percentile(model, 50), self.cost_per_request(model),
+                         self.routed[model], not self._healthy(model)))
+        return rows
@@ -0,0 +1,121 @@
+import copy
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from chat_client import ChatClient
+from transport import SharedResources
+
+
+class Session:
+    """One independent conversation managed by a SessionManager."""
+
+    def __init__(self, session_id, client):
+        self.id = session_id
+        self.client = client
+        self.created_at = time.time()
+        self.turns = 0
+        self.failed_turns = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()  # One turn at a time per conversation
+
+    def stats(self):
+        """Return this session's statistics as a dict."""
+        return {
+            "id": self.id,
+            "model": self.client.config.get_model(),
+            "turns": self.turns,
+            "failed_turns": self.failed_turns,
+            "messages": len(self.client.conversation_history),
+            "total_tokens": self.client.total_tokens,
+            "total_cost": self.client.total_cost,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+class SessionManager:
+    """
+    Multiplexes many independent conversations over one set of shared resources
+    (connection pool, model registry, file cache). Each session has its own
+    Config copy, history, budgets and stats; different sessions can run turns
+    concurrently, while turns within one session are serialized.
+    """
+
+    def __init__(self, config, max_workers=8, console=None):
+        self.config = config
+        self.console = console if console is not None else Console(quiet=True)
+        self.shared = SharedResources(config, pool_size=max(max_workers, 10))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, session_id=None, model=None, agent_mode=None,
+               token_budget=None, cost_budget=None, console=None):
+        """Create a new session and return it. Raises ValueError if the id is taken."""
+        session_config = copy.copy(self.config)
+        if model:
+            session_config.set_model(model)
+        if agent_mode is not None:
+            session_config.agent_mode = agent_mode
+        if token_budget is not None:
+            session_config.token_budget = token_budget
+        if cost_budget is not None:
+            session_config.cost_budget = cost_budget
+
+        session_id = session_id or uuid.uuid4().hex[:12]
+        client = ChatClient(session_config, console=console or self.console, shared=self.shared)
+        session = Session(session_id, client)
+        with self._lock:
+            if session_id in self._sessions:
+                raise ValueError(f"Session '{session_id}' already exists")
+            self._sessions[session_id] = session
+        return session
+
+    def get(self, session_id):
+        """Return a session by id. Raises KeyError if it doesn't exist."""
+        with self._lock:
+            return self._sessions[session_id]
+
+    def close(self, session_id):
+        """Close a session's client and forget it. Returns its final stats, or None if it didn't exist."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+        session.client.close()
+        return session.stats()
+
+    def list(self):
+        """Return all live sessions."""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def send(self, session_id, message):
+        """Run one turn in a session, blocking until the reply is ready."""
+        session = self.get(session_id)
+        with session.lock:
+            start = time.perf_counter()
+            try:
+                reply = session.client.send_chat_request(message)
+            finally:
+                session.busy_seconds += time.perf_counter() - start
+                session.turns += 1
+            if reply is None:
+                session.failed_turns += 1
+            return reply
+
+    def submit(self, session_id, message):
+        """Queue a turn on the shared worker pool and return a Future for the reply."""
+        return self.executor.submit(self.send, session_id, message)
+
+    def stats(self):
+        """Return per-session statistics for every live session."""
+        return [session.stats() for session in self.list()]
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool, close the remaining sessions and close pooled connections."""
+        self.executor.shutdown(wait=wait)
+        for session in self.list():
+            self.close(session.id)
+        self.shared.close()
@@ -0,0 +1,85 @@
+"""
+Tests for patching.py (run with: python -m pytest test_patching.py)
+"""
+import os
+import pytest
+import patching
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def write(path, content):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def apply(patch):
+    return patching.apply_patch(patching.parse_patch(patch))
+
+
+def test_modify_keeps_crlf_line_endings():
+    write("a.txt", "one\r\ntwo\r\nthree\r\n")
+    apply("--- a/a.txt\n+++ b/a.txt\n@@ -1,3 +1,3 @@\n one\n-two\n+TWO\n three\n")
+    assert read("a.txt") == "one\r\nTWO\r\nthree\r\n"
+
+
+def test_form_feed_and_unicode_line_separators_are_kept():
+    write("a.py", "x = 1\n\x0c\ns = 'a\u2028b'\ny = 2\n")
+    apply("--- a/a.py\n+++ b/a.py\n@@ -1,4 +1,4 @@\n x = 1\n \x0c\n s = 'a\u2028b'\n-y = 2\n+y = 3\n")
+    assert read("a.py") == "x = 1\n\x0c\ns = 'a\u2028b'\ny = 3\n"
+
+
+def test_fuzz_does_not_trim_an_insertion_down_to_no_context():
+    write("a.txt", "alpha\nbeta\ngamma\n")
+    patch = "--- a/a.txt\n+++ b/a.txt\n@@ -1,2 +1,3 @@\n one\n+inserted\n two\n"
+    with pytest.raises(patching.PatchError):
+        apply(patch)
+    assert read("a.txt") == "alpha\nbeta\ngamma\n"
+
+
+def test_insertion_without_context_uses_the_line_number():
+    write("a.txt", "alpha\nbeta\n")
+    apply("--- a/a.txt\n+++ b/a.txt\n@@ -1,0 +2 @@\n+inserted\n")
+    assert read("a.txt") == "alpha\ninserted\nbeta\n"
+
+
+def test_sections_for_the_same_file_are_applied_in_turn():
+    write("a.txt", "one\ntwo\nthree\nfour\n")
+    results = apply("--- a/a.txt\n+++ b/a.txt\n@@ -1,2 +1,2 @@\n-one\n+ONE\n two\n"
+                    "--- a/a.txt\n+++ b/a.txt\n@@ -3,2 +3,2 @@\n three\n-four\n+FOUR\n")
+    assert read("a.txt") == "ONE\ntwo\nthree\nFOUR\n"
+    assert [(r["path"], r["action"], r["added"], r["removed"]) for r in results] == [("a.txt", "M", 2, 2)]
+
+
+def test_creating_the_same_file_twice_is_rejected():
+    patch = "--- /dev/null\n+++ b/new.txt\n@@ -0,0 +1 @@\n+one\n" * 2
+    with pytest.raises(patching.PatchError):
+        apply(patch)
+    assert not os.path.exists("new.txt")
+
+
+def test_rename_onto_an_existing_file_is_rejected():
+    write("a.txt", "one\n")
+    write("b.txt", "keep me\n")
+    with pytest.raises(patching.PatchError):
+        apply("--- a/a.txt\n+++ b/b.txt\n@@ -1 +1 @@\n-one\n+ONE\n")
+    assert read("a.txt") == "one\n"
+    assert read("b.txt") == "keep me\n"
+
+
+def test_failing_hunk_leaves_every_file_unchanged():
+    write("a.txt", "one\n")
+    write("b.txt", "two\n")
+    with pytest.raises(patching.PatchError):
+        apply("--- a/a.txt\n+++ b/a.txt\n@@ -1 +1 @@\n-one\n+ONE\n"
+              "--- a/b.txt\n+++ b/b.txt\n@@ -1 +1 @@\n-nope\n+NOPE\n")
+    assert read("a.txt") == "one\n"
+    assert read("b.txt") == "two\n"
@@ -0,0 +1,116 @@
+import queue
+import threading
+from collections import OrderedDict
+from rich.markup import escape
+
+
+class ToolOutputWriter:
+    """
+    Prints tool results on a background thread so that wrapping and styling a
+    large result never holds up the agent loop. Long results are shown as a
+    head/tail preview; the full text of recent results is kept for `/show`.
+    The queue is bounded: when the terminal falls behind, previews are
+    skipped (and counted) rather than blocking tool execution.
+    """
+
+    def __init__(self, console, max_queue=64, head_lines=12, tail_lines=4, max_line_chars=300, keep=50):
+        self.console = console
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.max_line_chars = max_line_chars
+        self.keep = keep
+        self.outputs = OrderedDict()  # number -> (tool name, label, full text)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, name, label, text):
+        """Queue a tool's result for display and return its number for `/show`."""
+        text = str(text)
+        with self._lock:
+            self._counter += 1
+            number = self._counter
+            self.outputs[number] = (name, label, text)
+            while len(self.outputs) > self.keep:
+                self.outputs.popitem(last=False)
+            if self.console.quiet:
+                return number
+        self._start()
+        try:
+            self._queue.put_nowait((number, label, text))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        return number
+
+    def note(self, markup):
+        """Queue a status line, printed in order with the results around it."""
+        if self.console.quiet:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((None, markup, None))
+        except queue.Full:
+            pass
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="tool-output")
+                self._thread.start()
+
+    def preview(self, number, text):
+        """Return the head/tail preview of a result, with a note on what was hidden."""
+        lines = text.splitlines() or [""]
+        shown = lines
+        hidden = 0
+        if len(lines) > self.head_lines + self.tail_lines:
+            hidden = len(lines) - self.head_lines - self.tail_lines
+            shown = lines[:self.head_lines] + [None] + lines[-self.tail_lines:]
+        clipped = False
+        out = []
+        for line in shown:
+            if line is None:
+                out.append(f"   … {hidden} more lines (type /show {number} to see everything) …")
+            elif len(line) > self.max_line_chars:
+                out.append(line[:self.max_line_chars] + " …")
+                clipped = True
+            else:
+                out.append(line)
+        if clipped and not hidden:
+            out.append(f"   … long lines clipped (type /show {number} to see everything) …")
+        return "\n".join(out)
+
+    def _run(self):
+        while True:
+            number, label, text = self._queue.get()
+            try:
+                with self._lock:
+                    dropped, self.dropped = self.dropped, 0
+                if dropped:
+                    self.console.print(f"[dim]   ({dropped} tool result(s) not shown, see /show)[/dim]")
+                if text is None:
+                    self.console.print(label)
+                else:
+                    self.console.print(f"{label}{escape(self.preview(number, text))}")
+            except Exception:
+                pass  # Never let a display problem kill the writer
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued result has been printed."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def get(self, number):
+        """Return (tool name, label, full text) of a kept result, or None."""
+        with self._lock:
+            return self.outputs.get(number)
+
+    def list(self):
+        """Return [(number, tool name, size in characters)] for the kept results."""
+        with self._lock:
+            return [(n, name, len(text)) for n, (name, _, text) in self.outputs.items()]
@@ -1,11 +1,158 @@
 # tools.py
+import glob
+import io
 import os
+import stat
 import subprocess
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
+import jobs
+import outline
+import patching
 
 console = Console()
 
+# How confirmation prompts are answered: "ask" (interactive), "approve" or "deny"
+CONFIRMATION_MODE = "ask"
+
+def set_confirmation_mode(mode):
+    """Set how confirmation prompts are answered ("ask", "approve" or "deny")."""
+    global CONFIRMATION_MODE
+    if mode not in ("ask", "approve", "deny"):
+        raise ValueError(f"Invalid confirmation mode: {mode}")
+    CONFIRMATION_MODE = mode
+
+def _confirm(prompt):
+    """Ask the user for a y/N confirmation, honouring CONFIRMATION_MODE."""
+    if CONFIRMATION_MODE == "approve":
+        return True
+    if CONFIRMATION_MODE == "deny":
+        return False
+    return console.input(prompt).lower().strip() == 'y'
+
+# Tools that print a warning and call _confirm before acting
+PROMPTING_TOOLS = {"execute_python_file", "delete_file", "apply_patch"}
+
+def may_prompt(function_name):
+    """True if calling this tool can stop for an interactive confirmation."""
+    return CONFIRMATION_MODE == "ask" and function_name in PROMPTING_TOOLS
+
+class FileCache:
+    """
+    Bounded LRU cache of text file contents shared by the read tools.
+    Entries are validated against the file's mtime and size on every lookup,
+    so a changed file is always re-read from disk.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, content)
+        self._prefetched = set()  # Paths warmed ahead of use and not read yet
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_hits = 0
+
+    def get(self, filename):
+        """Return cached content if the file is unchanged since it was cached, else None."""
+        path = os.path.abspath(filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                if path in self._prefetched:
+                    self._prefetched.discard(path)
+                    self.prefetch_hits += 1
+                return entry[2]
+        return None
+
+    def put(self, filename, content, st):
+        """Store content read from a file whose stat result was taken before reading."""
+        path = os.path.abspath(filename)
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self._bytes -= len(old[2])
+            self._entries[path] = (st.st_mtime_ns, st.st_size, content)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_path, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[2])
+                self._prefetched.discard(evicted_path)
+
+    def read(self, filename):
+        """Return the file's text content, from cache when still valid."""
+        content = self.get(filename)
+        if content is not None:
+            return content
+        st = os.stat(filename)
+        with open(filename, 'r', encoding='utf-8') as f:
+            content = f.read()
+        with self._lock:
+            self.misses += 1
+        self.put(filename, content, st)
+        return content
+
+    def warm(self, filename, max_size=None):
+        """
+        Load a text file into the cache ahead of use (see prefetch.Prefetcher).
+        Returns True if it was read, False if already cached, missing, too
+        large or not UTF-8 text.
+        """
+        path = os.path.abspath(filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or (max_size and st.st_size > max_size):
+            return False
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                return False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return False
+        self.put(path, content, st)
+        with self._lock:
+            if path in self._entries:
+                self._prefetched.add(path)
+        return True
+
+    def invalidate(self, filename):
+        """Drop a file from the cache (called after the tools modify it)."""
+        path = os.path.abspath(filename)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self._bytes -= len(old[2])
+            self._prefetched.discard(path)
+
+    def clear(self):
+        """Drop every cached file."""
+        with self._lock:
+            self._entries.clear()
+            self._prefetched.clear()
+            self._bytes = 0
+
+# Process-wide read cache shared by all conversations
+file_cache = FileCache()
+
 def list_files(directory="."):
     """Lists all files and directories in the specified directory."""
     try:
@@ -33,6 +180,7 @@ def write_to_file(filename, content):
             return "❌ Error: Filename cannot be empty."
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(content)
+        file_cache.invalidate(filename)
         return f"✅ Successfully wrote to {filename}."
     except Exception as e:
         return f"❌ Error writing to file: {e}"
@@ -42,27 +190,41 @@ def read_file(filename):
     try:
         if not filename or not filename.strip():
             return "❌ Error: Filename cannot be empty."
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = file_cache.read(filename)
         return f"📄 Content of {filename}:\n{content}"
     except FileNotFoundError:
         return f"❌ Error: File '{filename}' not found."
     except Exception as e:
         return f"❌ Error reading file: {e}"
 
-def execute_python_file(filename):
+def execute_python_file(filename, background=False):
     """
-    Executes a Python script and returns its output.
+    Executes a Python script and returns its output, or with background=True
+    starts it as a background job and returns the job id straight away.
     **SECURITY WARNING**: This function executes code on your machine.
     Only run scripts you trust.
     """
-    console.print(f"\n⚠️  [bold yellow]WARNING: About to execute Python script '{filename}'[/bold yellow]")
-    console.print("[yellow]This will run code on your machine. Only proceed if you trust this script.[/yellow]")
-    proceed = console.input("[bold]Continue? (y/N): [/bold]").lower().strip()
+    if CONFIRMATION_MODE == "ask":
+        mode = " in the background" if background else ""
+        console.print(f"\n⚠️  [bold yellow]WARNING: About to execute Python script '{filename}'{mode}[/bold yellow]")
+        console.print("[yellow]This will run code on your machine. Only proceed if you trust this script.[/yellow]")
     
-    if proceed != 'y':
+    if not _confirm("[bold]Continue? (y/N): [/bold]"):
         return "🛑 Execution cancelled by user."
 
+    if background:
+        if not os.path.isfile(filename):
+            return f"❌ Error: Script '{filename}' not found."
+        try:
+            job = jobs.job_manager.start(filename)
+        except jobs.JobLimitError as e:
+            return f"❌ Error: {e}. Wait for a job to finish (job_status) or stop one (cancel_job)."
+        except OSError as e:
+            return f"❌ Error starting '{filename}': {e}"
+        return (f"🚀 Started job {job.id}: {filename} is running in the background (PID {job.process.pid}).\n"
+                f"Use job_status({job.id}) to check on it, job_output({job.id}) to read its output "
+                f"and cancel_job({job.id}) to stop it.")
+
     try:
         result = subprocess.run(
             [sys.executable, filename],
@@ -84,12 +246,60 @@ def execute_python_file(filename):
     except FileNotFoundError:
         return f"❌ Error: Script '{filename}' not found."
     except subprocess.TimeoutExpired:
-        return f"⏱️ Error: Script '{filename}' timed out after 30 seconds."
+        return f"⏱️ Error: Script '{filename}' timed out after 30 seconds. Run long scripts with background=true."
     except subprocess.CalledProcessError as e:
         return f"❌ Error executing script '{filename}':\nExit code: {e.returncode}\nSTDOUT:\n{e.stdout}\nSTDERR:\n{e.stderr}"
     except Exception as e:
         return f"❌ An unexpected error occurred: {e}"
 
+def _job_summary(job):
+    line = f"#{job.id} {job.filename}: {job.status} after {job.runtime:.1f}s"
+    if job.returncode is not None and not job.cancelled:
+        line += f" (exit code {job.returncode})"
+    return line + f", {job.lines} line(s) of output"
+
+def job_status(job_id=None):
+    """Reports the status of one background job, or lists them all."""
+    if job_id is None:
+        listed = jobs.job_manager.list()
+        if not listed:
+            return "📋 No background jobs."
+        running = sum(1 for job in listed if job.running)
+        lines = [f"📋 Background jobs ({running} running, limit {jobs.job_manager.max_jobs}):"]
+        lines.extend(f"  {_job_summary(job)}" for job in listed)
+        return "\n".join(lines)
+    job = jobs.job_manager.get(int(job_id))
+    if job is None:
+        return f"❌ Error: No background job {job_id}."
+    tail = job.tail(5)
+    output = "\n".join(tail) if tail else "(no output yet)"
+    return f"📋 Job {_job_summary(job)}\nLast lines:\n{output}"
+
+def job_output(job_id, lines=50):
+    """Returns the last lines of a background job's output (stdout and stderr interleaved)."""
+    job = jobs.job_manager.get(int(job_id))
+    if job is None:
+        return f"❌ Error: No background job {job_id}."
+    lines = max(1, min(int(lines), jobs.job_manager.tail_lines))
+    tail = job.tail(lines)
+    header = f"📜 Job {_job_summary(job)}"
+    if job.lines > len(tail):
+        header += f"; showing the last {len(tail)}"
+    output = header + ":\n" + ("\n".join(tail) if tail else "(no output yet)")
+    if job.log_path:
+        output += f"\n(Full log: {job.log_path})"
+    return output
+
+def cancel_job(job_id):
+    """Stops a running background job."""
+    job = jobs.job_manager.get(int(job_id))
+    if job is None:
+        return f"❌ Error: No background job {job_id}."
+    if not job.running:
+        return f"⚠️ Job {_job_summary(job)}; nothing to cancel."
+    jobs.job_manager.cancel(job.id)
+    return f"🛑 Cancelled job {_job_summary(job)}."
+
 def create_directory(directory_name):
     """Creates a new directory."""
     try:
@@ -108,13 +318,14 @@ def delete_file(filename):
         if not os.path.exists(filename):
             return f"❌ File '{filename}' does not exist."
         
-        console.print(f"\n⚠️  [bold red]WARNING: About to delete '{filename}'[/bold red]")
-        proceed = console.input("[bold]Are you sure? (y/N): [/bold]").lower().strip()
+        if CONFIRMATION_MODE == "ask":
+            console.print(f"\n⚠️  [bold red]WARNING: About to delete '{filename}'[/bold red]")
         
-        if proceed != 'y':
+        if not _confirm("[bold]Are you sure? (y/N): [/bold]"):
             return "🛑 File deletion cancelled by user."
         
         os.remove(filename)
+        file_cache.invalidate(filename)
         return f"🗑️ Successfully deleted: {filename}"
     except Exception as e:
         return f"❌ Error deleting file: {e}"
@@ -126,6 +337,7 @@ def append_to_file(filename, content):
             return "❌ Error: Filename cannot be empty."
         with open(filename, 'a', encoding='utf-8') as f:
             f.write(content)
+        file_cache.invalidate(filename)
         return f"➕ Successfully appended to {filename}."
     except Exception as e:
         return f"❌ Error appending to file: {e}"
@@ -140,8 +352,7 @@ def replace_in_file(filename, old_text, new_text):
         if not os.path.exists(filename):
             return f"❌ File '{filename}' does not exist."
         
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = file_cache.read(filename)
         
         if old_text not in content:
             return f"❌ Text '{old_text}' not found in {filename}."
@@ -150,6 +361,7 @@ def replace_in_file(filename, old_text, new_text):
         
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(new_content)
+        file_cache.invalidate(filename)
         
         occurrences = content.count(old_text)
         return f"🔄 Successfully replaced {occurrences} occurrence(s) of '{old_text}' with '{new_text}' in {filename}."
@@ -179,6 +391,7 @@ def insert_line_at_position(filename, line_number, content):
         
         with open(filename, 'w', encoding='utf-8') as f:
             f.writelines(lines)
+        file_cache.invalidate(filename)
         
         return f"📝 Successfully inserted line at position {line_number} in {filename}."
     except Exception as e:
@@ -190,8 +403,7 @@ def read_file_lines(filename, start_line=None, end_line=None):
         if not os.path.exists(filename):
             return f"❌ File '{filename}' does not exist."
         
-        with open(filename, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        lines = io.StringIO(file_cache.read(filename)).readlines()
         
         total_lines = len(lines)
         
@@ -217,6 +429,178 @@ def read_file_lines(filename, start_line=None, end_line=None):
     except Exception as e:
         return f"❌ Error reading file lines: {e}"
 
+# Limits for read_many_files
+MAX_MANY_FILES = 50
+DEFAULT_MANY_FILES_BUDGET = 100000  # Characters shared by all files (roughly 25k tokens)
+
+def _expand_paths(paths):
+    """Expand glob patterns and return existing file paths in order, without duplicates."""
+    files = []
+    missing = []
+    seen = set()
+    for pattern in paths:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                missing.append(pattern)
+        else:
+            matches = [pattern] if os.path.exists(pattern) else []
+            if not matches:
+                missing.append(pattern)
+        for path in matches:
+            key = os.path.abspath(path)
+            if os.path.isfile(path) and key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files, missing
+
+def _read_for_excerpt(path):
+    try:
+        return path, file_cache.read(path), None
+    except UnicodeDecodeError:
+        return path, None, "not a UTF-8 text file"
+    except Exception as e:
+        return path, None, str(e)
+
+def _excerpt(path, content, allowance):
+    """
+    Render a file as numbered lines in at most `allowance` characters,
+    counting its header, line prefixes and truncation note. A line that
+    doesn't fit whole is cut short. Returns (section, file characters shown).
+    """
+    lines = content.splitlines()
+    header = f"📄 {path} ({len(lines)} lines)\n"
+    rows = [f"{i:4}: {line}\n" for i, line in enumerate(lines, start=1)]
+    if len(header) + sum(len(row) for row in rows) <= allowance:
+        return header + "".join(rows), len(content)
+
+    def note(last, cut):
+        return (f"   ... truncated: showing lines 1-{last} of {len(lines)}{' (the last cut short)' if cut else ''}; "
+                f"use read_file_lines for the rest\n")
+
+    room = allowance - len(header) - len(note(len(lines), True))
+    shown = []
+    size = 0
+    for row, line in zip(rows, lines):
+        if len(row) > room:
+            break
+        shown.append(row)
+        room -= len(row)
+        size += len(line) + 1
+    number = len(shown) + 1
+    part = room - len(f"{number:4}: …\n")
+    cut = part > 0
+    if cut:
+        shown.append(f"{number:4}: {lines[number - 1][:part]}…\n")
+        size += part
+    return header + "".join(shown) + note(len(shown), cut), size
+
+def read_many_files(paths, max_chars=None):
+    """
+    Reads several files (paths or glob patterns) concurrently. One character
+    budget is shared fairly between them: small files are returned whole and
+    large ones as a numbered head excerpt with a truncation note. Everything
+    returned, headers and line numbers included, fits in the budget.
+    """
+    try:
+        if isinstance(paths, str):
+            paths = [paths]
+        if not paths:
+            return "❌ Error: No paths given."
+        budget = max_chars or DEFAULT_MANY_FILES_BUDGET
+        files, missing = _expand_paths(paths)
+        skipped = len(files) - MAX_MANY_FILES
+        files = files[:MAX_MANY_FILES]
+
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(files)))) as executor:
+            results = list(executor.map(_read_for_excerpt, files))
+        texts = {path: content for path, content, _ in results if content is not None}
+        total = sum(len(t) for t in texts.values())
+
+        notices = ""
+        if missing:
+            notices += f"⚠️  Not found: {', '.join(missing)}\n"
+        if skipped > 0:
+            notices += f"⚠️  {skipped} more file(s) matched but were not read (limit {MAX_MANY_FILES}); use narrower patterns\n"
+
+        def summary(used):
+            return f"📚 Read {len(texts)} file(s), {used} of {total} characters shown:\n" + notices + "\n"
+
+        sections = {path: f"❌ {path}: {error}\n" for path, _, error in results if error}
+        remaining = budget - len(summary(total)) - sum(len(s) + 1 for s in sections.values())
+        # Water-filling: smallest files first, each taking at most an even share of what is left,
+        # so whatever a file doesn't need goes to the larger ones after it
+        used = 0
+        pending = sorted(texts, key=lambda p: len(texts[p]))
+        while pending:
+            path = pending.pop(0)
+            share = remaining // (len(pending) + 1) - 1  # Blank line between sections
+            sections[path], shown = _excerpt(path, texts[path], share)
+            remaining -= len(sections[path]) + 1
+            used += shown
+        return summary(used) + "\n".join(sections[path] for path, _, _ in results)
+    except Exception as e:
+        return f"❌ Error reading files: {e}"
+
+def file_outline(path="."):
+    """
+    Returns the structure of a Python file, or of every Python file in a
+    directory: classes, functions with signatures, first docstring lines and
+    line ranges. Outlines are cached until the file changes.
+    """
+    try:
+        if not path:
+            path = "."
+        if os.path.isdir(path):
+            outlines, skipped = outline.outline_directory(path)
+            if not outlines:
+                return f"❌ No Python files found in '{path}'."
+            result = "\n\n".join(outlines)
+            if skipped:
+                result += f"\n\n⚠️  {skipped} more file(s) not outlined (limit {outline.MAX_DIRECTORY_FILES}); outline a subdirectory instead."
+            return result
+        if not os.path.exists(path):
+            return f"❌ Error: '{path}' not found."
+        if not path.endswith((".py", ".pyw")):
+            return f"❌ Error: '{path}' is not a Python file."
+        return outline.outline_file(path) + "\n\nUse read_file_lines with a line range to read a symbol."
+    except Exception as e:
+        return f"❌ Error outlining '{path}': {e}"
+
+def apply_patch(patch):
+    """
+    Applies a unified diff that may touch several files. Either every hunk
+    applies and all files are updated together, or no file is changed.
+    """
+    try:
+        if not patch or not patch.strip():
+            return "❌ Error: Patch cannot be empty."
+        file_patches = patching.parse_patch(patch)
+
+        deleted = [fp.old_path for fp in file_patches if fp.is_delete]
+        if deleted:
+            if CONFIRMATION_MODE == "ask":
+                console.print(f"\n⚠️  [bold red]WARNING: This patch deletes {', '.join(deleted)}[/bold red]")
+            if not _confirm("[bold]Apply it? (y/N): [/bold]"):
+                return "🛑 Patch cancelled by user."
+
+        results = patching.apply_patch(file_patches)
+        for fp in file_patches:
+            for path in (fp.old_path, fp.new_path):
+                if path:
+                    file_cache.invalidate(path)
+
+        output = f"🩹 Successfully applied patch to {len(results)} file(s):\n"
+        for result in results:
+            output += f"  {result['action']} {result['path']} (+{result['added']} -{result['removed']})\n"
+            for note in result["notes"]:
+                output += f"      note: {note}\n"
+        return output
+    except patching.PatchError as e:
+        return f"❌ Error applying patch: {e}. No files were changed."
+    except Exception as e:
+        return f"❌ Error applying patch: {e}"
+
 # Tool definitions for the API
 TOOLS_DEFINITIONS = [
     {
@@ -269,16 +653,60 @@ TOOLS_DEFINITIONS = [
         "type": "function",
         "function": {
             "name": "execute_python_file",
-            "description": "Execute a python script and get the output. User will be prompted for confirmation before execution.",
+            "description": "Execute a python script and get the output. User will be prompted for confirmation before execution. Scripts are stopped after 30 seconds; for long runs (test suites, data jobs) set background=true to start a background job and get its id immediately, then keep working and check on it with job_status/job_output.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "filename": {"type": "string", "description": "The name of the python file to execute."}
+                    "filename": {"type": "string", "description": "The name of the python file to execute."},
+                    "background": {"type": "boolean", "description": "Run as a background job with no time limit and return its job id immediately. Defaults to false."}
                 },
                 "required": ["filename"],
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "job_status",
+            "description": "Check the status of a background job (running, succeeded, failed or cancelled, with runtime, exit code and last output lines), or list all background jobs when no id is given.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "integer", "description": "The job id returned by execute_python_file. Omit to list all jobs."}
+                },
+                "required": [],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "job_output",
+            "description": "Read the last lines of a background job's output (stdout and stderr interleaved), while it runs or after it has finished.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "integer", "description": "The job id."},
+                    "lines": {"type": "integer", "description": "How many lines from the end to return. Defaults to 50."}
+                },
+                "required": ["job_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "cancel_job",
+            "description": "Stop a running background job and any processes it started.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "integer", "description": "The job id."}
+                },
+                "required": ["job_id"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -370,6 +798,49 @@ TOOLS_DEFINITIONS = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_many_files",
+            "description": "Read several files in one call, given paths and/or glob patterns (e.g. 'src/**/*.py'). Use this instead of many read_file calls when gathering context. Files share one size budget; large files come back as a numbered head excerpt with a note where they were cut.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "paths": {"type": "array", "items": {"type": "string"}, "description": "File paths or glob patterns to read."},
+                    "max_chars": {"type": "integer", "description": "Total characters to return across all files. Defaults to 100000."}
+                },
+                "required": ["paths"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "file_outline",
+            "description": "Show the structure of a Python file or of all Python files in a directory: classes, functions with signatures, first docstring lines and line ranges. Much cheaper than reading whole files; use read_file_lines on a line range afterwards to read the code you need.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string", "description": "A .py file or a directory. Defaults to the current directory."}
+                },
+                "required": [],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "apply_patch",
+            "description": "Apply a unified diff (like `git diff` output) to one or more files at once. Prefer this over write_to_file or replace_in_file when editing existing code: only changed lines and a few lines of context are needed. Use '--- /dev/null' to create a file and '+++ /dev/null' to delete one. Hunks are matched even if line numbers or whitespace are slightly off. Either all files are changed or none are.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "patch": {"type": "string", "description": "The unified diff, with '--- a/path' and '+++ b/path' headers for each file followed by '@@' hunks."}
+                },
+                "required": ["patch"],
+            },
+        },
+    },
 ]
 
 # Available tools mapping
@@ -378,10 +849,16 @@ AVAILABLE_TOOLS = {
     "write_to_file": write_to_file,
     "read_file": read_file,
     "execute_python_file": execute_python_file,
+    "job_status": job_status,
+    "job_output": job_output,
+    "cancel_job": cancel_job,
     "create_directory": create_directory,
     "delete_file": delete_file,
     "append_to_file": append_to_file,
     "replace_in_file": replace_in_file,
     "insert_line_at_position": insert_line_at_position,
     "read_file_lines": read_file_lines,
+    "read_many_files": read_many_files,
+    "file_outline": file_outline,
+    "apply_patch": apply_patch,
 } 
\ No newline at end of file
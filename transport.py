@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import jobs
+import tools
+from hedging import LatencyTracker
+from prefetch import Prefetcher
+from rate_limiter import rate_limiter_for
+from response_cache import ResponseCache
+
+
+class ModelRegistry:
+    """Thread-safe, TTL-cached view of the OpenRouter model list."""
+
+    def __init__(self, http, api_base, headers, ttl=600):
+        self.http = http
+        self.api_base = api_base
+        self.headers = headers
+        self.ttl = ttl
+        self._models = None
+        self._by_id = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Fetch the model list from the API. Raises requests.exceptions.RequestException on failure."""
+        response = self.http.get(f"{self.api_base}/models", headers=self.headers)
+        response.raise_for_status()
+        models = sorted(response.json().get("data", []), key=lambda x: x.get('id'))
+        with self._lock:
+            self._models = models
+            self._by_id = {m.get('id'): m for m in models}
+            self._fetched_at = time.monotonic()
+        return models
+
+    def get_models(self):
+        """Return the cached model list, fetching it if missing or stale."""
+        with self._lock:
+            if self._models is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._models
+        return self.refresh()
+
+    def get_model(self, model_id):
+        """Return the cached metadata for one model, or None if unknown or unavailable."""
+        try:
+            self.get_models()
+        except requests.exceptions.RequestException:
+            pass
+        with self._lock:
+            return self._by_id.get(model_id)
+
+    def get_pricing(self, model_id):
+        """Return (prompt, completion) USD prices per token for a model, or (0.0, 0.0) if unknown."""
+        model = self.get_model(model_id) or {}
+        pricing = model.get('pricing', {})
+        try:
+            return float(pricing.get('prompt', 0)), float(pricing.get('completion', 0))
+        except (TypeError, ValueError):
+            return 0.0, 0.0
+
+
+class SharedResources:
+    """
+    Process-wide state shared by every conversation: one pooled HTTP session,
+    the model registry, the file read cache and its prefetcher, the API key's
+    rate limiter, per-model latency measurements, the background job table
+    and (when enabled) the response cache.
+    Conversation state (history, budgets, stats) stays on each ChatClient.
+    """
+
+    def __init__(self, config, pool_size=16):
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.http.headers.update({
+            "Authorization": f"Bearer {config.api_key}",
+            "HTTP-Referer": config.app_url,
+            "X-Title": config.app_name,
+        })
+        self.models = ModelRegistry(self.http, config.api_base, {})
+        self.file_cache = tools.file_cache
+        self.prefetcher = Prefetcher(self.file_cache) if config.prefetch else None
+        self.jobs = jobs.job_manager
+        self.jobs.max_jobs = config.max_background_jobs
+        self.jobs.log_dir = os.path.join(config.data_dir, "jobs")
+        self.rate_limiter = rate_limiter_for(config)
+        self.latency = LatencyTracker(os.path.join(config.data_dir, "latency.json"))
+        self.response_cache = None
+        if config.response_cache:
+            self.response_cache = ResponseCache(
+                os.path.join(config.data_dir, "response_cache.sqlite"),
+                max_bytes=int(config.response_cache_max_mb * 1024 * 1024),
+                ttl_seconds=config.response_cache_ttl,
+            )
+
+    def close(self):
+        """Close pooled connections, the prefetcher and the response cache, and save latency measurements."""
+        self.http.close()
+        self.latency.save()
+        if self.prefetcher:
+            self.prefetcher.close()
+        if self.response_cache:
+            self.response_cache.close()
@@ -1,6 +1,10 @@
+import os
+import time
+import jobs
 from rich.console import Console
 from rich.table import Table
 from rich.markdown import Markdown
+from profiling import TurnProfiler
 
 console = Console()
 
@@ -14,7 +18,18 @@ def print_help():
 - `/agent`: Toggle coding agent mode (enables file system tools).
 - `/parallel`: Toggle tool execution mode (parallel/sequential).
 - `/max-tools <number>`: Set maximum tool calls per response (1-20).
+- `/compare <model> <model> ...`: Send one prompt to several models at once and compare speed, tokens and cost.
+- `/router [on|off]`: Show how requests are routed between the strong and fast models, or turn routing on/off.
+- `/jobs [output|cancel <id>]`: List background jobs, page through one's output, or stop one.
+- `/show [number]`: List recent tool results, or page through one in full.
+- `/fork [name]`: Branch the conversation here and switch to the new branch.
+- `/switch <name>`: Switch to another conversation branch.
+- `/branches [run <name> <name> ...]`: List branches, or send one message to several branches at once and compare the replies.
+- `/profile [message]`: Profile the next message (CPU hot spots by module and memory allocations).
+- `/follow-through <ask|auto|off>`: Choose what happens when the AI promises a tool call but doesn't make it.
 - `/stats`: Show conversation statistics.
+- `/sessions`: List saved conversations.
+- `/resume <id>`: Resume a saved conversation.
 - `/reset`: Reset the conversation history.
 - `/clear`: Clear the console screen.
 - `/exit`: Exit the application.
@@ -31,7 +46,7 @@ When agent mode is enabled, the AI has access to these tools:
 - **Parallel**: Tools run simultaneously (faster for independent operations)
 
 ## Smart Tool Promise Detection 🎯
-The CLI now automatically detects when the AI says it will use a tool (like "let me check the files") but doesn't actually call the function. When this happens, you'll get a warning and option to make the AI follow through!
+The CLI now automatically detects when the AI says it will use a tool (like "let me check the files") but doesn't actually call the function. When this happens, you'll get a warning and option to make the AI follow through! Use `/follow-through auto` to send the follow-up without asking.
 
 Agent mode is perfect for coding tasks, file management, and automation!
     """)
@@ -102,6 +117,8 @@ def display_welcome_message(client):
     console.print(f"Type a message to start chatting or `/help` for commands.")
     console.print(f"Using model: [cyan]{client.config.get_model()}[/cyan]")
     console.print(f"Agent mode: [yellow]{'🤖 ON' if client.config.agent_mode else '💬 OFF'}[/yellow] (type `/agent` to toggle)")
+    if client.session_id:
+        console.print(f"Session: [cyan]{client.session_id}[/cyan] (saved automatically, see `/sessions`)")
     if client.config.agent_mode:
         execution_emoji = "⚡" if client.config.tool_execution_mode == "parallel" else "🔄"
         console.print(f"Tool execution: [cyan]{execution_emoji} {client.config.tool_execution_mode.upper()}[/cyan] | Max tools: [cyan]{client.config.max_tool_calls}[/cyan]")
@@ -148,4 +165,326 @@ def handle_max_tools_command(client, command):
                 console.print(f"[yellow]Current max tool calls: {client.config.max_tool_calls}[/yellow]")
                 console.print("[yellow]Usage: /max-tools <number>[/yellow]")
         except ValueError:
-            console.print("[bold red]❌ Please provide a valid number.[/bold red]")
\ No newline at end of file
+            console.print("[bold red]❌ Please provide a valid number.[/bold red]")
+
+def handle_follow_through_command(client, command):
+    """Handle the promise follow-through policy command."""
+    parts = command.split()
+    if len(parts) == 2:
+        if client.config.set_promise_policy(parts[1]):
+            console.print(f"[bold green]✅ Follow-through policy set to: {parts[1]}[/bold green]")
+        else:
+            console.print("[bold red]❌ Invalid policy. Use ask, auto or off.[/bold red]")
+    else:
+        console.print(f"[yellow]Current follow-through policy: {client.config.promise_policy}[/yellow]")
+        console.print("[yellow]Usage: /follow-through <ask|auto|off>[/yellow]")
+
+def handle_compare_command(client, command):
+    """Ask for a prompt and run it on several models concurrently, then show the answers side by side."""
+    models = [m for part in command.split()[1:] for m in part.split(",") if m]
+    if not models:
+        console.print("[yellow]Usage: /compare <model> <model> ... (e.g. /compare openai/gpt-4o anthropic/claude-3.5-sonnet)[/yellow]")
+        return
+    if len(models) > 8:
+        console.print("[bold red]❌ Compare at most 8 models at once.[/bold red]")
+        return
+    prompt = console.input(f"[bold green]Prompt for {len(models)} model(s):[/bold green] ").strip()
+    if not prompt:
+        console.print("[yellow]Comparison cancelled.[/yellow]")
+        return
+
+    with console.status(f"[bold green]Waiting for {len(models)} models...[/bold green]"):
+        started = time.monotonic()
+        results = client.compare_models(prompt, models)
+        elapsed = time.monotonic() - started
+    if results is None:
+        return
+
+    for result in results:
+        console.rule(f"[bold cyan]{result['model']}[/bold cyan]")
+        if result["error"]:
+            console.print(f"[bold red]❌ {result['error']}[/bold red]")
+        else:
+            if result["content"]:
+                console.print(Markdown(result["content"]))
+            if result["tool_calls"]:
+                console.print(f"[dim](wants to call: {', '.join(result['tool_calls'])})[/dim]")
+
+    table = Table(title=f"Model Comparison ({elapsed:.2f}s total)")
+    table.add_column("Model", style="cyan")
+    table.add_column("Latency", justify="right")
+    table.add_column("Prompt Tokens", justify="right")
+    table.add_column("Completion Tokens", justify="right")
+    table.add_column("Cost", justify="right", style="magenta")
+    for result in sorted(results, key=lambda r: (r["error"] is not None, r["latency"])):
+        usage = result["usage"]
+        table.add_row(
+            result["model"],
+            f"{result['latency']:.2f}s" if not result["error"] else "[red]failed[/red]",
+            str(usage.get("prompt_tokens", "-")),
+            str(usage.get("completion_tokens", "-")),
+            f"${result['cost']:.6f}",
+        )
+    console.print(table)
+    console.print("[dim]Answers were not added to the conversation.[/dim]")
+
+def handle_router_command(client, command):
+    """Show the model router's tiers and measurements, or turn routing on or off."""
+    router = client.router
+    parts = command.split()
+    if len(parts) == 2 and parts[1] in ("on", "off"):
+        router.enabled = client.config.routing = parts[1] == "on"
+        console.print(f"[bold green]✅ Model routing {parts[1].upper()}[/bold green]")
+        if router.enabled and not router.fast_models:
+            console.print("[yellow]⚠️  No fast models configured. Set FAST_MODELS to route follow-ups.[/yellow]")
+        return
+    if len(parts) > 1:
+        console.print("[yellow]Usage: /router [on|off][/yellow]")
+        return
+    status = "ON" if router.active else ("OFF" if router.fast_models else "OFF (no FAST_MODELS configured)")
+    table = Table(title=f"Model Routing: {status}")
+    table.add_column("Model", style="cyan")
+    table.add_column("Tier")
+    table.add_column("First Byte p50", justify="right")
+    table.add_column("Cost / Request", justify="right", style="magenta")
+    table.add_column("Routed", justify="right")
+    for model, tier, ttfb, cost, routed, resting in router.stats(client.config.get_model()):
+        table.add_row(
+            model + (" [yellow](resting)[/yellow]" if resting else ""),
+            tier,
+            f"{ttfb:.2f}s" if ttfb is not None else "-",
+            f"${cost:.6f}" if cost is not None else "-",
+            str(routed),
+        )
+    console.print(table)
+    console.print("[dim]Prompts use the strong model; follow-ups after tool results use the fastest suitable fast model.[/dim]")
+
+def handle_jobs_command(command):
+    """List background jobs, show one's output in a pager, or cancel one."""
+    parts = command.split()
+    manager = jobs.job_manager
+    if len(parts) == 1:
+        listed = manager.list()
+        if not listed:
+            console.print("[yellow]No background jobs.[/yellow]")
+            return
+        table = Table(title=f"Background Jobs (limit {manager.max_jobs} running)")
+        table.add_column("#", style="cyan", justify="right")
+        table.add_column("Script")
+        table.add_column("Status")
+        table.add_column("Runtime", justify="right")
+        table.add_column("Exit", justify="right")
+        table.add_column("Output", justify="right")
+        colors = {"running": "yellow", "succeeded": "green", "failed": "red", "cancelled": "dim"}
+        for job in listed:
+            table.add_row(
+                str(job.id),
+                job.filename,
+                f"[{colors[job.status]}]{job.status}[/{colors[job.status]}]",
+                f"{job.runtime:.1f}s",
+                "-" if job.returncode is None else str(job.returncode),
+                f"{job.lines} lines",
+            )
+        console.print(table)
+        console.print("[dim]Use /jobs output <id> to read a job's output, /jobs cancel <id> to stop it.[/dim]")
+        return
+    if len(parts) != 3 or parts[1] not in ("output", "cancel"):
+        console.print("[yellow]Usage: /jobs [output <id> | cancel <id>][/yellow]")
+        return
+    try:
+        job = manager.get(int(parts[2]))
+    except ValueError:
+        console.print("[bold red]❌ Please provide a valid job id.[/bold red]")
+        return
+    if job is None:
+        console.print(f"[yellow]No background job #{parts[2]}.[/yellow]")
+        return
+    if parts[1] == "cancel":
+        if not job.running:
+            console.print(f"[yellow]Job #{job.id} already {job.status}.[/yellow]")
+            return
+        manager.cancel(job.id)
+        console.print(f"[bold green]🛑 Cancelled job #{job.id} ({job.filename}).[/bold green]")
+        return
+    with console.pager():
+        console.print(f"Job #{job.id} {job.filename}: {job.status}", markup=False, highlight=False)
+        console.print("\n".join(job.tail(manager.tail_lines)), markup=False, highlight=False)
+
+def handle_show_command(client, command):
+    """List recent tool results or show one of them in full in a pager."""
+    writer = client.tool_output
+    parts = command.split()
+    if len(parts) == 1:
+        outputs = writer.list()
+        if not outputs:
+            console.print("[yellow]No tool results yet.[/yellow]")
+            return
+        table = Table(title="Recent Tool Results")
+        table.add_column("#", style="cyan", justify="right")
+        table.add_column("Tool", style="magenta")
+        table.add_column("Size", justify="right")
+        for number, name, size in outputs:
+            table.add_row(str(number), name, f"{size:,} chars")
+        console.print(table)
+        console.print("[dim]Use /show <number> to see a result in full.[/dim]")
+        return
+    try:
+        entry = writer.get(int(parts[1]))
+    except ValueError:
+        console.print("[bold red]❌ Please provide a valid number.[/bold red]")
+        return
+    if entry is None:
+        console.print(f"[yellow]No tool result #{parts[1]} (only the last {writer.keep} are kept).[/yellow]")
+        return
+    name, _, text = entry
+    with console.pager():
+        console.print(f"Tool result #{parts[1]}: {name}", markup=False, highlight=False)
+        console.print(text, markup=False, highlight=False)
+
+def _last_reply(client):
+    for message in reversed(client.conversation_history[-20:]):
+        if message.role == "assistant" and message.content:
+            return message.content
+    return ""
+
+def handle_fork_command(branches, command):
+    """Fork the current conversation branch and switch to the new one."""
+    parts = command.split()
+    parent = branches.current
+    try:
+        branch = branches.fork(parts[1] if len(parts) > 1 else None)
+    except ValueError as e:
+        console.print(f"[bold red]❌ {e}[/bold red]")
+        return
+    console.print(f"[bold green]🌿 Forked '{parent}' into '{branch.name}' at {branch.forked_at} messages. "
+                  f"Now on '{branch.name}'.[/bold green]")
+    console.print(f"[dim]Use /switch {parent} to go back, /branches to compare.[/dim]")
+
+def handle_switch_command(branches, command):
+    """Switch to another conversation branch."""
+    parts = command.split()
+    if len(parts) != 2:
+        console.print("[yellow]Usage: /switch <branch> (see /branches)[/yellow]")
+        return
+    try:
+        branch = branches.switch(parts[1])
+    except KeyError:
+        console.print(f"[bold red]❌ No branch named '{parts[1]}'. Type /branches to list them.[/bold red]")
+        return
+    console.print(f"[bold green]🌿 Switched to '{branch.name}' "
+                  f"({len(branch.client.conversation_history)} messages).[/bold green]")
+
+def handle_branches_command(branches, command):
+    """List conversation branches, or run one message on several of them concurrently and compare."""
+    parts = command.split()
+    if len(parts) == 1:
+        table = Table(title="Conversation Branches")
+        table.add_column("Branch", style="cyan")
+        table.add_column("From", style="dim")
+        table.add_column("Messages", justify="right")
+        table.add_column(f"Shared with {branches.current}", justify="right")
+        table.add_column("Tokens", justify="right")
+        table.add_column("Cost", justify="right", style="magenta")
+        table.add_column("Last Reply")
+        for branch in branches.list():
+            client = branch.client
+            name = f"* {branch.name}" if branch.name == branches.current else branch.name
+            reply = " ".join(_last_reply(client).split())
+            table.add_row(
+                name,
+                f"{branch.parent} @ {branch.forked_at}" if branch.parent else "-",
+                str(len(client.conversation_history)),
+                str(branches.shared_messages(branch.name)),
+                str(client.total_tokens),
+                f"${client.total_cost:.6f}",
+                reply[:60] + ("…" if len(reply) > 60 else ""),
+            )
+        console.print(table)
+        return
+    names = [n for part in parts[2:] for n in part.split(",") if n] if parts[1] == "run" else []
+    if not names:
+        console.print("[yellow]Usage: /branches run <branch> <branch> ... (or /branches to list them)[/yellow]")
+        return
+    missing = [n for n in names if n not in {b.name for b in branches.list()}]
+    if missing:
+        console.print(f"[bold red]❌ Unknown branch(es): {', '.join(missing)}[/bold red]")
+        return
+    message = console.input(f"[bold green]Message for {len(names)} branch(es):[/bold green] ").strip()
+    if not message:
+        console.print("[yellow]Run cancelled.[/yellow]")
+        return
+
+    with console.status(f"[bold green]Running {len(names)} branches...[/bold green]"):
+        started = time.monotonic()
+        results = branches.run(names, message)
+        elapsed = time.monotonic() - started
+
+    for result in results:
+        console.rule(f"[bold cyan]{result['branch']}[/bold cyan]")
+        if result["error"]:
+            console.print(f"[bold red]❌ {result['error']}[/bold red]")
+        elif result["reply"]:
+            console.print(Markdown(result["reply"]))
+
+    table = Table(title=f"Branch Comparison ({elapsed:.2f}s total)")
+    table.add_column("Branch", style="cyan")
+    table.add_column("Time", justify="right")
+    table.add_column("Tokens", justify="right")
+    table.add_column("Cost", justify="right", style="magenta")
+    table.add_column("Messages", justify="right")
+    for result in results:
+        table.add_row(
+            result["branch"],
+            f"{result['latency']:.2f}s" if not result["error"] else "[red]failed[/red]",
+            str(result["tokens"]),
+            f"${result['cost']:.6f}",
+            str(result["messages"]),
+        )
+    console.print(table)
+    console.print("[dim]Each reply was added to its own branch.[/dim]")
+
+def handle_profile_command(client, message):
+    """Send one message under the CPU profiler and allocation tracer and print where the time went."""
+    profiler = TurnProfiler(os.path.join(client.config.data_dir, "profiles"))
+    profiler.run(client.send_chat_request, message)
+
+def handle_sessions_command(client):
+    """Display saved conversations."""
+    if not client.store:
+        console.print("[yellow]⚠️  Conversation persistence is disabled (PERSIST_HISTORY=false).[/yellow]")
+        return
+    sessions = client.store.list_sessions()
+    if not sessions:
+        console.print("[yellow]No saved conversations yet.[/yellow]")
+        return
+
+    table = Table(title="Saved Conversations")
+    table.add_column("Session ID", style="cyan")
+    table.add_column("Updated", style="green")
+    table.add_column("Messages", style="magenta")
+    table.add_column("Title", style="white")
+    for entry in sessions[:20]:
+        marker = " (current)" if entry["id"] == client.session_id else ""
+        table.add_row(
+            entry["id"] + marker,
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("updated", 0))),
+            str(entry.get("messages", "?")),
+            entry.get("title", ""),
+        )
+    console.print(table)
+    console.print("[dim]Use /resume <id> to continue a conversation.[/dim]")
+
+def handle_resume_command(client, command):
+    """Handle resuming a saved conversation."""
+    if not client.store:
+        console.print("[yellow]⚠️  Conversation persistence is disabled (PERSIST_HISTORY=false).[/yellow]")
+        return
+    parts = command.split()
+    if len(parts) != 2:
+        console.print("[yellow]Usage: /resume <session id> (see /sessions)[/yellow]")
+        return
+    try:
+        count = client.resume_session(parts[1])
+        console.print(f"[bold green]✅ Resumed session {parts[1]} ({count} messages)[/bold green]")
+    except KeyError:
+        console.print(f"[bold red]❌ Unknown session: {parts[1]}[/bold red]")